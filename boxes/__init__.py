@@ -20,26 +20,51 @@ import copy
 import datetime
 import gettext
 import inspect
+import io
 import math
 import random
 import re
 import sys
+import time
 from argparse import ArgumentParser
 from contextlib import contextmanager
 from functools import wraps
 from shlex import quote
-from typing import Any
-from xml.sax.saxutils import quoteattr
+from typing import Any, Callable
 
-import qrcode
-from shapely.geometry import *
-from shapely.ops import split
-
-from boxes import edges, formats, gears, parts, pulley
+from boxes import edges, formats
 from boxes.Color import *
-from boxes.qrcode_factory import BoxesQrCodeFactory
 from boxes.vectors import kerf
 
+# Expensive modules that used to be imported here. They are now imported
+# where they are needed - and on first access of boxes.<name> for code
+# outside of this package.
+_LAZY_IMPORTS = {
+    "gears": ("boxes.gears", None),
+    "parts": ("boxes.parts", None),
+    "pulley": ("boxes.pulley", None),
+    "qrcode": ("qrcode", None),
+    "BoxesQrCodeFactory": ("boxes.qrcode_factory", "BoxesQrCodeFactory"),
+    "quoteattr": ("xml.sax.saxutils", "quoteattr"),
+    "split": ("shapely.ops", "split"),
+}
+_LAZY_IMPORTS.update((name, ("shapely.geometry", name)) for name in (
+    "CAP_STYLE", "JOIN_STYLE", "GeometryCollection", "LineString",
+    "LinearRing", "MultiLineString", "MultiPoint", "MultiPolygon", "Point",
+    "Polygon", "box", "mapping", "shape"))
+
+
+def __getattr__(name):
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    module, attr = _LAZY_IMPORTS[name]
+    value = importlib.import_module(module)
+    if attr is not None:
+        value = getattr(value, attr)
+    globals()[name] = value
+    return value
+
 ### Helpers
 
 def dist(dx, dy):
@@ -148,6 +173,10 @@ HexSizes = { # (nut width, nut height, shaft width)
     "2-1/2": (3.750*25.4, 2.209*25.4, (2+1/2)*25.4),
 }
 
+class RenderCancelled(Exception):
+    """Rendering was stopped by Boxes.cancel_check"""
+
+
 class NutHole:
     """Draw a hex nut"""
 
@@ -207,6 +236,22 @@ def argparseSections(s):
 
     return result
 
+def argparseFeedPower(s):
+    """
+    Parse FEED:POWER parameter of the G-code output
+
+    :param s: string to parse
+    """
+    def number(v):
+        v = float(v)
+        return int(v) if v.is_integer() else v
+
+    try:
+        feed, power = (number(v) for v in s.split(":"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("Use FEED:POWER e.g. 600:1000")
+    return feed, power
+
 class ArgparseEdgeType:
     """argparse type to select from a set of edge types"""
 
@@ -233,6 +278,7 @@ class ArgparseEdgeType:
         return """<select name="{}" id="{}" aria-labeledby="{} {}" size="1">\n{}</select>\n""".format(name,  name, name+"_id", name+"_description", options)
 
     def inx(self, name, viewname, arg):
+        from xml.sax.saxutils import quoteattr
         return ('        <param name="%s" type="optiongroup" appearance="combo" gui-text="%s" gui-description=%s>\n' %
                 (name, viewname, quoteattr(arg.help or "")) +
                 ''.join('            <option value="{}">{} {}</option>\n'.format(
@@ -304,6 +350,100 @@ Values:
         "space_to_border":     4.0,
     }
 
+class SharedArgumentParser:
+    """Read only view of the argument parser of a generator class
+
+    Wraps the parser (or an argument group of it) that was built by the
+    first instance of the class. Adding arguments is ignored as the
+    parser already has them. Everything else is passed on.
+    """
+
+    def __init__(self, parser=None) -> None:
+        self._parser = parser
+
+    def add_argument(self, *args, **kw) -> None:
+        pass
+
+    def add_argument_group(self, *args, **kw) -> SharedArgumentParser:
+        return SharedArgumentParser()
+
+    def set_defaults(self, **kw) -> None:
+        pass
+
+    @property
+    def _action_groups(self) -> list[SharedArgumentParser]:
+        return [SharedArgumentParser(g) for g in self._parser._action_groups]
+
+    def __getattr__(self, name):
+        if name == "_parser":
+            raise AttributeError(name)
+        return getattr(self._parser, name)
+
+class LazyEdges(dict):
+    """Edges of a Boxes instance
+
+    The default edges are created in groups on first look up - see
+    Boxes._buildObjects(). Iterating over them creates all of them.
+    """
+
+    def __init__(self, order=()) -> None:
+        super().__init__()
+        self.pending: dict[Any, Any] = {}  # char -> function creating it
+        self.order = order  # of the chars if all are created at once
+
+    def __missing__(self, key):
+        create = self.pending.get(key)
+        if create is None:
+            raise KeyError(key)
+        create()
+        return dict.__getitem__(self, key)
+
+    def __contains__(self, key) -> bool:
+        return dict.__contains__(self, key) or key in self.pending
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def createAll(self) -> None:
+        if not self.pending:
+            return
+        for create in list(self.pending.values()):
+            create()
+        # same order as if they had been created right away
+        items = dict(dict.items(self))
+        dict.clear(self)
+        for c in self.order:
+            if c in items:
+                dict.__setitem__(self, c, items.pop(c))
+        dict.update(self, items)
+
+    def __iter__(self):
+        self.createAll()
+        return dict.__iter__(self)
+
+    def __len__(self) -> int:
+        self.createAll()
+        return dict.__len__(self)
+
+    def keys(self):
+        self.createAll()
+        return dict.keys(self)
+
+    def values(self):
+        self.createAll()
+        return dict.values(self)
+
+    def items(self):
+        self.createAll()
+        return dict.items(self)
+
+    def copy(self):
+        self.createAll()
+        return dict(dict.items(self))
+
 ##############################################################################
 ### Main class
 ##############################################################################
@@ -317,6 +457,14 @@ class Boxes:
 
     description: str = ""  # Markdown syntax is supported
 
+    # Limits for rendering - exceeding them raises
+    # boxes.drawing.RenderBudgetExceeded
+    max_render_time: float | None = None  # in seconds, counted from .open()
+    max_segments: int | None = None
+    # Asked before each part. Returning True aborts rendering with
+    # RenderCancelled - e.g. if the result is not needed any more.
+    cancel_check: Callable[[], bool] | None = None
+
     def __init__(self) -> None:
         self.formats = formats.Formats()
         self.ctx = None
@@ -325,10 +473,20 @@ class Boxes:
             description = inspect.cleandoc(self.__doc__)
         if self.description:
             description += "\n\n" + self.description
-        self.argparser = ArgumentParser(description=description)
+        # The parser only depends on the class and the UI. It is built by
+        # the first instance and shared by the later ones - see .parseArgs()
+        cached = self.__class__.__dict__.get("_argparser")
+        if cached and cached[:2] == (ArgumentParser, self.UI):
+            self.argparser = SharedArgumentParser(cached[2])
+        else:
+            self.argparser = ArgumentParser(description=description)
         self.edgesettings: dict[Any, Any] = {}
         self.non_default_args: dict[Any, Any] = {}
         self.translations = gettext.NullTranslations()
+        # Seconds spent in parseArgs, open, render, close and convert -
+        # see .close() - and the size of the drawing
+        self.timings: dict[str, float] = {}
+        self.counters: dict[str, int] = {}
 
         short_description: str = ""
         if self.__doc__:
@@ -349,6 +507,8 @@ class Boxes:
         # Dummy attribute for static analytic tools. Will be overwritten by `argparser` at runtime.
         self.thickness: float = 0.0
 
+        if isinstance(self.argparser, SharedArgumentParser):
+            return
         self.argparser._action_groups[1].title = self.__class__.__name__ + " Settings"
         defaultgroup = self.argparser.add_argument_group(
                         "Default Settings")
@@ -392,6 +552,25 @@ class Boxes:
         defaultgroup.add_argument(
             "--spacing", action="store", type=spacing_type, default="0.5",
             help='spacing around parts (multiples of thickness [: extra space in mm]) [\U0001F6C8](https://florianfesti.github.io/boxes/html/usermanual.html#spacing)')
+        plottergroup = self.argparser.add_argument_group(
+            "Plotter Settings", "only used for the plt and gcode formats")
+        # the web interface shows the group for these formats only
+        plottergroup.formats = ("plt", "gcode")
+        plottergroup.add_argument(
+            "--plotter_tolerance", action="store", type=float, default=0.01,
+            help="maximum deviation (in mm) when curves are converted to lines")
+        plottergroup.add_argument(
+            "--plt_speed", action="store", type=float, default=0.0,
+            help="pen speed (in cm/s) for the plt format (zero for the plotter's default)")
+        plottergroup.add_argument(
+            "--gcode_cut", action="store", type=argparseFeedPower, default="600:1000",
+            help="feed rate (in mm/min) and laser power (S value) for cuts and other colours in the gcode format")
+        plottergroup.add_argument(
+            "--gcode_etching", action="store", type=argparseFeedPower, default="3000:300",
+            help="feed rate (in mm/min) and laser power (S value) for etchings in the gcode format")
+        plottergroup.add_argument(
+            "--gcode_etching_deep", action="store", type=argparseFeedPower, default="1500:600",
+            help="feed rate (in mm/min) and laser power (S value) for deep etchings in the gcode format")
 
     @contextmanager
     def saved_context(self):
@@ -429,9 +608,18 @@ class Boxes:
         """
         if self.ctx is not None:
             return
+        start = time.perf_counter()
 
         self.bedBoltSettings = (3, 5.5, 2, 20, 15)  # d, d_nut, h_nut, l, l1
         self.surface, self.ctx = self.formats.getSurface(self.format)
+        if self.max_segments is not None:
+            self.surface.max_segments = self.max_segments
+        if self.max_render_time is not None:
+            self.surface.deadline = time.monotonic() + self.max_render_time
+        self.surface.configure(
+            tolerance=self.plotter_tolerance, speed=self.plt_speed,
+            cut=self.gcode_cut, etching=self.gcode_etching,
+            etching_deep=self.gcode_etching_deep)
 
         if self.format == 'svg_Ponoko':
             self.ctx.set_line_width(0.01)
@@ -456,6 +644,8 @@ class Boxes:
             if self.qr_code:
                 self.renderQrCode()
             self.ctx.stroke()
+        self._opened = time.perf_counter()
+        self.timings["open"] = self._opened - start
 
     def renderQrCode(self):
         content = self.metadata['url_short'] or self.metadata["cli_short"]
@@ -577,6 +767,7 @@ class Boxes:
         """
         if args is None:
             args = sys.argv[1:]
+        start = time.perf_counter()
 
         def cliQuote(s: str) -> str:
             s = s.replace('\r', '')
@@ -586,6 +777,10 @@ class Boxes:
         self.metadata["cli"] = "boxes " + self.__class__.__name__ + " " + " ".join(cliQuote(arg) for arg in args)
         self.metadata["cli"] = self.metadata["cli"].strip()
 
+        if not isinstance(self.argparser, SharedArgumentParser):
+            # construction of the instance is done - share the parser
+            self.__class__._argparser = (ArgumentParser, self.UI, self.argparser)
+
         for key, value in vars(self.argparser.parse_args(args=args)).items():
             default = self.argparser.get_default(key)
 
@@ -605,6 +800,7 @@ class Boxes:
 
         self.metadata["cli_short"] = "boxes " + self.__class__.__name__ + " " + " ".join(cliQuote(arg) for arg in args if (arg.split("=")[0][2:] in self.non_default_args))
         self.metadata["cli_short"] = self.metadata["cli_short"].strip()
+        self.timings["parseArgs"] = time.perf_counter() - start
 
     def addPart(self, part, name=None):
         """
@@ -628,72 +824,121 @@ class Boxes:
 
     fingerHolesAt : Any
 
+    # Edge chars and attributes added by each group of default objects
+    # and the order of all edges. Recorded by the first ._buildObjects()
+    _objectLayout: list[tuple[list, list]] | None = None
+    _edgeOrder: list[Any] = []
+
     def _buildObjects(self):
-        """Add default edges and parts"""
-        self.edges = {}
-        self.addPart(edges.Edge(self, None))
-        self.addPart(edges.OutSetEdge(self, None))
-        edges.GripSettings(self.thickness).edgeObjects(self)
-
-        # Finger joints
-        # Share settings object
-        s = edges.FingerJointSettings(self.thickness, True,
-                **self.edgesettings.get("FingerJoint", {}))
-        s.edgeObjects(self)
-        self.addPart(edges.FingerHoles(self, s), name="fingerHolesAt")
-        # Stackable
-        edges.StackableSettings(self.thickness, True,
-            **self.edgesettings.get("Stackable", {})).edgeObjects(self)
-        # Dove tail joints
-        edges.DoveTailSettings(self.thickness, True,
-            **self.edgesettings.get("DoveTail", {})).edgeObjects(self)
-        # Flex
-        s = edges.FlexSettings(self.thickness, True,
-                **self.edgesettings.get("Flex", {}))
-        self.addPart(edges.FlexEdge(self, s))
-        # Clickable
-        edges.ClickSettings(self.thickness, True,
-                **self.edgesettings.get("Click", {})).edgeObjects(self)
-        # Hinges
-        edges.HingeSettings(self.thickness, True,
-                **self.edgesettings.get("Hinge", {})).edgeObjects(self)
-        edges.ChestHingeSettings(self.thickness, True,
-                **self.edgesettings.get("ChestHinge", {})).edgeObjects(self)
-        edges.CabinetHingeSettings(self.thickness, True,
-                **self.edgesettings.get("CabinetHinge", {})).edgeObjects(self)
-        # Sliding Lid
-        edges.SlideOnLidSettings(self.thickness, True,
-                **self.edgesettings.get("SlideOnLid", {})).edgeObjects(self)
-        # Rounded Triangle Edge
-        edges.RoundedTriangleEdgeSettings(self.thickness, True,
-                **self.edgesettings.get("RoundedTriangleEdge", {})).edgeObjects(self)
-        # Grooved Edge
-        edges.GroovedSettings(self.thickness, True,
-                              **self.edgesettings.get("Grooved", {})).edgeObjects(self)
-        # Mounting Edge
-        edges.MountingSettings(self.thickness, True,
-                              **self.edgesettings.get("Mounting", {})).edgeObjects(self)
-        # Handle Edge
-        edges.HandleEdgeSettings(self.thickness, True,
-                              **self.edgesettings.get("HandleEdge", {})).edgeObjects(self)
-        # HexHoles
-        self.hexHolesSettings = HexHolesSettings(self.thickness, True,
-                **self.edgesettings.get("HexHoles", {}))
-        # Lids
-        from . import lids
-        self.lidSettings = lids.LidSettings(self.thickness, True,
-                                       **self.edgesettings.get("Lid", {}))
-        self.lid = lids.Lid(self, self.lidSettings)
-
-        # Nuts
-        self.addPart(NutHole(self, None))
-        # Gears
-        self.addPart(gears.Gears(self))
-        s = edges.GearSettings(self.thickness, True,
-                **self.edgesettings.get("Gear", {}))
-        self.addPart(edges.RackEdge(self, s))
-        self.addPart(pulley.Pulley(self))
-        self.addPart(parts.Parts(self))
+        """Add default edges and parts
+
+        They are created in groups sharing their settings on first look
+        up in .edges or first access of one of the attributes.
+        """
+        from . import gears, lids, parts, pulley
+
+        # use the values as they are now even if created later
+        thickness = self.thickness
+        edgesettings = {name: dict(values) for name, values in self.edgesettings.items()}
+
+        def settings(cls, name):
+            return cls(thickness, True, **edgesettings.get(name, {}))
+
+        def basic():
+            self.addPart(edges.Edge(self, None))
+            self.addPart(edges.OutSetEdge(self, None))
+            edges.GripSettings(thickness).edgeObjects(self)
+
+        def fingerJoints():
+            s = settings(edges.FingerJointSettings, "FingerJoint")
+            s.edgeObjects(self)
+            self.addPart(edges.FingerHoles(self, s), name="fingerHolesAt")
+
+        def lid():
+            self.lidSettings = settings(lids.LidSettings, "Lid")
+            self.lid = lids.Lid(self, self.lidSettings)
+
+        groups = [
+            basic,
+            fingerJoints,
+            lambda: settings(edges.StackableSettings, "Stackable").edgeObjects(self),
+            lambda: settings(edges.DoveTailSettings, "DoveTail").edgeObjects(self),
+            lambda: self.addPart(edges.FlexEdge(self, settings(edges.FlexSettings, "Flex"))),
+            lambda: settings(edges.ClickSettings, "Click").edgeObjects(self),
+            lambda: settings(edges.HingeSettings, "Hinge").edgeObjects(self),
+            lambda: settings(edges.ChestHingeSettings, "ChestHinge").edgeObjects(self),
+            lambda: settings(edges.CabinetHingeSettings, "CabinetHinge").edgeObjects(self),
+            lambda: settings(edges.SlideOnLidSettings, "SlideOnLid").edgeObjects(self),
+            lambda: settings(edges.RoundedTriangleEdgeSettings, "RoundedTriangleEdge").edgeObjects(self),
+            lambda: settings(edges.GroovedSettings, "Grooved").edgeObjects(self),
+            lambda: settings(edges.MountingSettings, "Mounting").edgeObjects(self),
+            lambda: settings(edges.HandleEdgeSettings, "HandleEdge").edgeObjects(self),
+            lambda: setattr(self, "hexHolesSettings", settings(HexHolesSettings, "HexHoles")),
+            lid,
+            lambda: self.addPart(NutHole(self, None)),
+            lambda: self.addPart(gears.Gears(self)),
+            lambda: self.addPart(edges.RackEdge(self, settings(edges.GearSettings, "Gear"))),
+            lambda: self.addPart(pulley.Pulley(self)),
+            lambda: self.addPart(parts.Parts(self)),
+        ]
+
+        self.edges = LazyEdges(Boxes._edgeOrder)
+        self._lazyAttributes = {}
+        if Boxes._objectLayout is None:
+            # Create everything and record what each group adds
+            layout = []
+            for group in groups:
+                old_edges = dict(dict.items(self.edges))
+                old_attrs = dict(self.__dict__)
+                group()
+                layout.append((
+                    [c for c, e in dict.items(self.edges) if old_edges.get(c) is not e],
+                    [n for n, v in self.__dict__.items() if n not in old_attrs or old_attrs[n] is not v]))
+            Boxes._objectLayout = layout
+            Boxes._edgeOrder = self.edges.order = list(dict.keys(self.edges))
+            return
+
+        for group, (chars, attrs) in zip(groups, Boxes._objectLayout):
+            create = self._lazyObjects(group, chars, attrs)
+            for c in chars:
+                self.edges.pending[c] = create
+            for name in attrs:
+                self._lazyAttributes[name] = create
+
+    def _lazyObjects(self, group, chars, attrs):
+        """Return function creating a group of default objects once"""
+        def create():
+            edges, lazy = self.edges, self._lazyAttributes
+            for c in chars:
+                if edges.pending.get(c) is create:
+                    del edges.pending[c]
+            for name in attrs:
+                if lazy.get(name) is create:
+                    del lazy[name]
+            # Keep what was there before. Remove what other groups add later.
+            old_edges = {c: dict.__getitem__(edges, c) for c in chars
+                         if dict.__contains__(edges, c)}
+            old_attrs = {n: self.__dict__[n] for n in attrs if n in self.__dict__}
+            group()
+            for c in chars:
+                if c in old_edges:
+                    dict.__setitem__(edges, c, old_edges[c])
+                elif c in edges.pending:
+                    dict.__delitem__(edges, c)
+            for name in attrs:
+                if name in old_attrs:
+                    self.__dict__[name] = old_attrs[name]
+                elif name in lazy:
+                    del self.__dict__[name]
+        return create
+
+    def __getattr__(self, name):
+        # Default parts are created on first access - see ._buildObjects()
+        create = self.__dict__.get("_lazyAttributes", {}).get(name)
+        if create is None:
+            raise AttributeError(f"{self.__class__.__name__!r} object has no attribute {name!r}")
+        create()
+        return self.__dict__[name]
 
     def adjustSize(self, l, e1=True, e2=True):
         # Char to edge object
@@ -776,13 +1021,20 @@ class Boxes:
         else:
             return param
 
-    def close(self):
+    def close(self, stream=False):
         """Finish rendering
 
         Flush canvas to disk and convert output to requested format if needed.
-        Call after .render()"""
+        Call after .render()
+
+        :param stream:  (Default value = False) return an iterator of bytes
+          chunks that are generated while being consumed instead of a BytesIO
+        """
         if self.ctx is None:
             return
+        start = time.perf_counter()
+        # everything between .open() and .close() counts as rendering
+        self.timings["render"] = start - self._opened
 
         self.ctx.stroke()
         self.ctx = None
@@ -790,10 +1042,44 @@ class Boxes:
         self.surface.set_metadata(self.metadata)
 
         self.surface.flush()
-        data = self.surface.finish(self.inner_corners)
+        parts = self.surface.parts
+        self.counters = {
+            "segments": self.surface.count,
+            "paths": sum(len(part.pathes) for part in parts),
+            "parts": len(parts),
+        }
+        self.timings["close"] = time.perf_counter() - start
 
-        data = self.formats.convert(data, self.format)
-        return data
+        if self.formats.isCompressed(self.format):
+            data = formats.gzip_chunks(self.surface.stream(self.inner_corners))
+        elif not self.formats.needsConversion(self.format):
+            data = self.surface.stream(self.inner_corners)
+        else:
+            start = time.perf_counter()
+            data = self.formats.convert(
+                self.surface.stream(self.inner_corners), self.format)
+            self.timings["convert"] = time.perf_counter() - start
+            if stream:
+                return iter((data.getvalue(),))
+            return data
+        data = self._timed("convert", data)
+        if stream:
+            return data
+        return io.BytesIO(b"".join(data))
+
+    def _timed(self, phase, chunks):
+        """Add the time spent generating chunks to .timings[phase]
+
+        The output is generated while being consumed, so the time is
+        only complete after the last chunk.
+        """
+        self.timings[phase] = 0.0
+        start = time.perf_counter()
+        for chunk in chunks:
+            self.timings[phase] += time.perf_counter() - start
+            yield chunk
+            start = time.perf_counter()
+        self.timings[phase] += time.perf_counter() - start
 
     ############################################################
     ### Turtle graphics commands
@@ -1223,6 +1509,9 @@ class Boxes:
         if not where:
             where = ""
 
+        if before and self.cancel_check is not None and self.cancel_check():
+            raise RenderCancelled("Rendering was cancelled")
+
         terms = where.split()
         dontdraw = before and "only" in terms
 
@@ -1625,6 +1914,8 @@ class Boxes:
         self.ctx.restore()
 
     def qrcode(self, content: str, box_size: float = 1.0, color=Color.ETCHING, move: str | None = None):
+        import qrcode
+        from boxes.qrcode_factory import BoxesQrCodeFactory
         q = qrcode.QRCode(image_factory=BoxesQrCodeFactory, box_size=box_size*10)
         q.add_data(content)
         m = q.get_matrix()
@@ -1677,6 +1968,9 @@ class Boxes:
         :param bar_length:  maximum bar length
         :param max_random:  maximum number of random holes
         """
+        from shapely.geometry import LineString, Point, Polygon
+        from shapely.ops import split
+
         if pattern not in ["random", "hex", "square", "hbar", "vbar"]:
             return
 
@@ -1734,6 +2028,7 @@ class Boxes:
             grid = {}
             misses = 0 # in a row
             while i < max_random and misses < 20:
+                self.surface.check_budget()
                 i += 1
                 misses += 1
                 # random new point
@@ -1805,6 +2100,7 @@ class Boxes:
             y = min_y + bspace + max_radius_y
 
             while y < (max_y - bspace - max_radius_y):
+                self.surface.check_budget()
                 if pattern == "square" or row % 2 == 0:
                     xs = min_x + bspace + max_radius_x
                 else:
@@ -1907,6 +2203,7 @@ class Boxes:
             step_y = 2 * max_radius_y + hspace - 0.0001
 
             while y < (max_y - bspace - max_radius):
+                self.surface.check_budget()
                 # toggle segment length each new line
                 if segment_toggle:
                     segment_max = 0
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
-import codecs
 import io
 import math
+import time
+import zlib
+from array import array
 from typing import Any
 from xml.etree import ElementTree as ET
 
@@ -13,9 +15,32 @@ from boxes.extents import Extents
 EPS = 1e-4
 PADDING = 10
 
+# numpy is imported on first use by _numpy() and only used for drawings
+# with at least NUMPY_MIN_SEGMENTS segments as it is not worth its import
+# time for smaller ones. False if it is not available.
+np: Any = None
+NUMPY_MIN_SEGMENTS = 20000
+
+
+def _numpy():
+    global np, NPOINTS
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            np = False
+        else:
+            np = numpy
+            NPOINTS = np.array(NCOORDS) // 2
+    return np
+
 RANDOMIZE_COLORS = False  # enable to ease check for continuity of paths
 
 
+class RenderBudgetExceeded(ValueError):
+    """Rendering took more time or segments than allowed"""
+
+
 def reorder_attributes(root) -> None:
     """
     Source: https://docs.python.org/3/library/xml.etree.elementtree.html#xml.etree.ElementTree.Element.remove
@@ -43,6 +68,9 @@ class Surface:
 
     scale = 1.0
     invert_y = False
+    max_segments = 1000000
+    # time.monotonic() value after which rendering is aborted
+    deadline: float | None = None
 
     def __init__(self) -> None:
         self.parts: list[Any] = []
@@ -52,12 +80,28 @@ class Surface:
     def set_metadata(self, metadata):
         self.metadata = metadata
 
+    def configure(self, **settings):
+        """Apply the output settings of the user
+
+        Each surface picks the settings it supports and ignores the rest.
+        """
+        pass
+
     def flush(self):
         pass
 
     def finish(self):
         pass
 
+    def stream(self, inner_corners="loop"):
+        """Generate the output as chunks of bytes"""
+        yield self.finish(inner_corners).getvalue()
+
+    def write(self, f, inner_corners="loop"):
+        """Write the output to the binary file-like object f"""
+        for chunk in self.stream(inner_corners):
+            f.write(chunk)
+
     def _adjust_coordinates(self):
         extents = self.extents()
         extents.xmin -= PADDING
@@ -83,8 +127,36 @@ class Surface:
         renderer.finish()
 
     def transform(self, f, m, invert_y=False):
-        for p in self.parts:
-            p.transform(f, m, invert_y)
+        if self.count < NUMPY_MIN_SEGMENTS or not _numpy():
+            for p in self.parts:
+                p.transform(f, m, invert_y)
+            return
+        for part in self.parts:
+            assert(not part.path)
+        pathes = self._all_pathes()
+        if not pathes:
+            return
+        # transform the coordinates of all pathes in one go
+        views = [np.frombuffer(p.coords) for p in pathes]
+        coords = np.concatenate(views)
+        sa, sb, sc, sd, se, sf = m[:6]
+        x, y = coords[0::2], coords[1::2]
+        result = np.empty_like(coords)
+        result[0::2] = x * sa + y * sb + sc
+        result[1::2] = x * sd + y * se + sf
+        i = 0
+        for view in views:
+            view[:] = result[i:i+len(view)]
+            i += len(view)
+        del views
+        for p in pathes:
+            p.transform_params(f, m, invert_y)
+        for part in self.parts:
+            part.reindex_ends()
+
+    def _all_pathes(self):
+        """Return the stroked pathes of all parts"""
+        return [p for part in self.parts for p in part.pathes]
 
     def new_part(self, name="part"):
         if self.parts and len(self.parts[-1].pathes) == 0:
@@ -94,10 +166,18 @@ class Surface:
         self._p = p
         return p
 
+    def check_budget(self):
+        """Raise RenderBudgetExceeded if the deadline has passed"""
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise RenderBudgetExceeded("Rendering took too long")
+
     def append(self, *path):
         self.count += 1
-        if self.count > 100000:
-            raise ValueError("Too many lines")
+        if self.count > self.max_segments:
+            raise RenderBudgetExceeded("Too many lines")
+        if not self.count & 1023:
+            # only look at the clock every now and then
+            self.check_budget()
         self._p.append(*path)
 
     def stroke(self, **params):
@@ -109,13 +189,31 @@ class Surface:
     def extents(self):
         if not self.parts:
             return Extents()
-        return sum([p.extents() for p in self.parts])
+        if self.count < NUMPY_MIN_SEGMENTS or not _numpy():
+            return sum([p.extents() for p in self.parts])
+        pathes = self._all_pathes()
+        if not pathes:
+            return Extents()
+        # only the end points of the segments count - not the control points
+        ops = np.frombuffer(b"".join(p.ops for p in pathes), dtype=np.uint8)
+        points = np.concatenate(
+            [np.frombuffer(p.coords) for p in pathes]).reshape(-1, 2)
+        counts = NPOINTS[ops]
+        points = points[np.cumsum(counts) - counts]
+        xmin, ymin = points.min(axis=0)
+        xmax, ymax = points.max(axis=0)
+        e = Extents(float(xmin), float(ymin), float(xmax), float(ymax))
+        for p in pathes:
+            p.text_extents(e)
+        return e
 
 
 class Part:
     def __init__(self, name) -> None:
         self.pathes: list[Any] = []
-        self.path: list[Any] = []
+        self.path = Path()
+        # (cell x, cell y, params) -> indices of pathes ending in that cell
+        self._ends: dict[Any, list[int]] = {}
 
     def extents(self):
         if not self.pathes:
@@ -126,109 +224,272 @@ class Part:
         assert(not self.path)
         for p in self.pathes:
             p.transform(f, m, invert_y)
+        self.reindex_ends()
+
+    def reindex_ends(self):
+        """Rebuild the index of the path ends after they moved"""
+        self._ends.clear()
+        for idx in range(len(self.pathes)):
+            self._add_end(idx)
 
     def append(self, *path):
-        self.path.append(list(path))
+        self.path.append(*path)
+
+    @staticmethod
+    def _cell(x, y):
+        """Quantise point to a grid of EPS sized cells"""
+        if not (math.isfinite(x) and math.isfinite(y)):
+            return None
+        return math.floor(x / EPS), math.floor(y / EPS)
+
+    @staticmethod
+    def _params_key(params):
+        return tuple(sorted(params.items()))
+
+    def _add_end(self, idx):
+        p = self.pathes[idx]
+        cell = self._cell(*p.end_point())
+        if cell is not None:
+            key = (*cell, self._params_key(p.params))
+            self._ends.setdefault(key, []).append(idx)
+
+    def _remove_end(self, idx):
+        p = self.pathes[idx]
+        cell = self._cell(*p.end_point())
+        if cell is not None:
+            self._ends[(*cell, self._params_key(p.params))].remove(idx)
+
+    def _find_end(self, x, y, params):
+        """Return index of the last path ending at x, y or None"""
+        cell = self._cell(x, y)
+        if cell is None:
+            return None
+        cx, cy = cell
+        pkey = self._params_key(params)
+        found = None
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for idx in self._ends.get((cx + dx, cy + dy, pkey), ()):
+                    if ((found is None or idx > found) and
+                        points_equal(x, y, *self.pathes[idx].end_point())):
+                        found = idx
+        return found
 
     def stroke(self, **params):
-        if len(self.path) == 0:
+        path = self.path
+        if len(path) == 0:
             return
         # search for path ending at new start coordinates to append this path to
-        xy0 = self.path[0][1:3]
-        if (not points_equal(*xy0, *self.path[-1][1:3]) and
-            not self.path[0][0] == "T"):
-            for p in reversed(self.pathes):
-                xy1 = p.path[-1][1:3]
-                if points_equal(*xy0, *xy1) and p.params == params:
-                    p.path.extend(self.path[1:])
-                    self.path = []
-                    return p
-        p = Path(self.path, params)
-        self.pathes.append(p)
-        self.path = []
-        return p
+        xy0 = path.start_point()
+        if (not points_equal(*xy0, *path.end_point()) and
+            not path.ops[0] == TEXT):
+            idx = self._find_end(*xy0, params)
+            if idx is not None:
+                p = self.pathes[idx]
+                self._remove_end(idx)
+                p.extend(path)
+                self._add_end(idx)
+                self.path = Path()
+                return p
+        path.params = params
+        self.pathes.append(path)
+        self._add_end(len(self.pathes) - 1)
+        self.path = Path()
+        return path
 
     def move_to(self, *xy):
-        if len(self.path) == 0:
-            self.path.append(["M", *xy])
-        elif self.path[-1][0] == "M":
-            self.path[-1] = ["M", *xy]
+        path = self.path
+        if len(path) == 0:
+            path.append("M", *xy)
+        elif path.ops[-1] == MOVE:
+            path.coords[-2:] = array("d", xy)
         else:
-            xy0 = self.path[-1][1:3]
+            xy0 = path.end_point()
             if not points_equal(*xy0, *xy):
-                self.path.append(["M", *xy])
+                path.append("M", *xy)
+
+
+# Opcodes of the compact path storage. Every segment stores its end point
+# first, curves are followed by their two control points.
+MOVE, LINE, CURVE, TEXT = range(4)
+OPCODES = "MLCT"
+NCOORDS = (2, 2, 6, 2)
+NPOINTS: Any = None  # points per opcode as numpy array, set by _numpy()
 
 
 class Path:
-    def __init__(self, path, params) -> None:
-        self.path = path
+    """Sequence of segments stored as opcode bytes and a flat float buffer
+
+    Text segments keep their transformation matrix, text and parameters in
+    a side table in the order they appear in the path.
+    """
+
+    def __init__(self, params=None) -> None:
+        self.ops = bytearray()
+        self.coords = array("d")
+        self.texts: list[Any] = []
         self.params = params
 
+    def __len__(self) -> int:
+        return len(self.ops)
+
     def __repr__(self) -> str:
-        l = len(self.path)
-        # x1,y1 = self.path[0][1:3]
+        l = len(self.ops)
         if l>0:
-            x2, y2 = self.path[-1][1:3]
+            x2, y2 = self.end_point()
             return f"Path[{l}] to ({x2:.2f},{y2:.2f})"
         return f"empty Path"
 
+    def append(self, C, x, y, *args):
+        op = OPCODES.index(C)
+        self.ops.append(op)
+        self.coords.append(x)
+        self.coords.append(y)
+        if op == CURVE:
+            self.coords.extend(args)
+        elif op == TEXT:
+            self.texts.append(tuple(args))
+
+    def extend(self, other):
+        """Append other path without its leading move"""
+        self.ops.extend(other.ops[1:])
+        self.coords.extend(other.coords[NCOORDS[other.ops[0]]:])
+        self.texts.extend(other.texts)
+
+    def start_point(self):
+        return self.coords[0], self.coords[1]
+
+    def end_point(self):
+        i = len(self.coords) - NCOORDS[self.ops[-1]]
+        return self.coords[i], self.coords[i+1]
+
+    def offsets(self):
+        """Return the start index in .coords for every segment"""
+        offsets = []
+        i = 0
+        for op in self.ops:
+            offsets.append(i)
+            i += NCOORDS[op]
+        return offsets
+
+    def segments(self):
+        """Iterate over the segments as tuples like ("L", x, y)"""
+        coords = self.coords
+        texts = iter(self.texts)
+        i = 0
+        for op in self.ops:
+            if op == CURVE:
+                yield ("C", *coords[i:i+6])
+            elif op == TEXT:
+                yield ("T", coords[i], coords[i+1], *next(texts))
+            else:
+                yield (OPCODES[op], coords[i], coords[i+1])
+            i += NCOORDS[op]
+
+    @property
+    def path(self):
+        return list(self.segments())
+
     def extents(self):
         e = Extents()
-        for p in self.path:
-            e.add(*p[1:3])
-            if p[0] == 'T':
-                m, text, params = p[3:]
-                h = params['fs']
-                l = len(text) * h * 0.7
-                align = params.get('align', 'left')
-                start, end = {
-                    'left' : (0, 1),
-                    'middle' : (-0.5, 0.5),
-                    'end' : (-1, 0),
-                    }[align]
-                for x in (start*l, end*l):
-                    for y in (0, h):
-                        x_, y_ = m * (x, y)
-                        e.add(x_, y_)
+        coords = self.coords
+        i = 0
+        for op in self.ops:
+            e.add(coords[i], coords[i+1])
+            i += NCOORDS[op]
+        self.text_extents(e)
         return e
 
+    def text_extents(self, e):
+        """Add the boxes of all texts to Extents e"""
+        for m, text, params in self.texts:
+            h = params['fs']
+            l = len(text) * h * 0.7
+            align = params.get('align', 'left')
+            start, end = {
+                'left' : (0, 1),
+                'middle' : (-0.5, 0.5),
+                'end' : (-1, 0),
+                }[align]
+            for x in (start*l, end*l):
+                for y in (0, h):
+                    x_, y_ = m * (x, y)
+                    e.add(x_, y_)
+
     def transform(self, f, m, invert_y=False):
+        sa, sb, sc, sd, se, sf = m[:6]
+        coords = self.coords
+        for i in range(0, len(coords), 2):
+            vx, vy = coords[i], coords[i+1]
+            coords[i] = vx * sa + vy * sb + sc
+            coords[i+1] = vx * sd + vy * se + sf
+        self.transform_params(f, m, invert_y)
+
+    def transform_params(self, f, m, invert_y=False):
+        """Transform line width and texts but not the coordinates"""
         self.params["lw"] *= f
-        for c in self.path:
-            C = c[0]
-            c[1], c[2] = m * (c[1], c[2])
-            if C == 'C':
-                c[3], c[4] = m * (c[3], c[4])
-                c[5], c[6] = m * (c[5], c[6])
-            if C == "T":
-                c[3] = m * c[3]
-                if invert_y:
-                    c[3] *= Affine.scale(1, -1)
+        for n, (tm, text, params) in enumerate(self.texts):
+            tm = m * tm
+            if invert_y:
+                tm *= Affine.scale(1, -1)
+            self.texts[n] = (tm, text, params)
+
+    def _segment_equal(self, i, oi, j, oj, ti, tj):
+        op = self.ops[i]
+        if op != self.ops[j]:
+            return False
+        n = NCOORDS[op]
+        if self.coords[oi:oi+n] != self.coords[oj:oj+n]:
+            return False
+        return op != TEXT or self.texts[ti] == self.texts[tj]
 
     def faster_edges(self, inner_corners):
         if inner_corners == "backarc":
             return
 
-        for (i, p) in enumerate(self.path):
-            if p[0] == "C" and i > 1 and i < len(self.path) - 1:
-                if self.path[i - 1][0] == "L" and self.path[i + 1][0] == "L":
-                    p11 = self.path[i - 2][1:3]
-                    p12 = self.path[i - 1][1:3]
-                    p21 = p[1:3]
-                    p22 = self.path[i + 1][1:3]
-                    if (((p12[0]-p21[0])**2 + (p12[1]-p21[1])**2) >
-                        self.params["lw"]**2):
-                        continue
-                    lines_intersect, x, y = line_intersection((p11, p12), (p21, p22))
-                    if lines_intersect:
-                        self.path[i - 1] = ("L", x, y)
-                        if inner_corners == "loop":
-                            self.path[i] = ("C", x, y, *p12, *p21)
-                        else:
-                            self.path[i] =  ("L", x, y)
-        # filter duplicates
-        if len(self.path) > 1: # no need to find duplicates if only one element in path
-            self.path = [p for n, p in enumerate(self.path) if p != self.path[n-1]]
+        ops, coords = self.ops, self.coords
+        l = len(ops)
+        offsets = self.offsets()
+        lw2 = self.params["lw"]**2
+        for i in range(2, l - 1):
+            if ops[i] == CURVE and ops[i - 1] == LINE and ops[i + 1] == LINE:
+                o11, o12, o21, o22 = offsets[i-2:i+2]
+                p11 = coords[o11], coords[o11+1]
+                p12 = coords[o12], coords[o12+1]
+                p21 = coords[o21], coords[o21+1]
+                p22 = coords[o22], coords[o22+1]
+                if (((p12[0]-p21[0])**2 + (p12[1]-p21[1])**2) > lw2):
+                    continue
+                lines_intersect, x, y = line_intersection((p11, p12), (p21, p22))
+                if lines_intersect:
+                    coords[o12], coords[o12+1] = x, y
+                    if inner_corners == "loop":
+                        coords[o21:o21+6] = array("d", (x, y, *p12, *p21))
+                    else:
+                        # control points stay behind until compacted below
+                        ops[i] = LINE
+                        coords[o21], coords[o21+1] = x, y
+        # filter duplicates and compact the storage
+        if l > 1: # no need to find duplicates if only one element in path
+            tidx = []
+            t = 0
+            for op in ops:
+                tidx.append(t)
+                t += op == TEXT
+            new_ops = bytearray()
+            new_coords = array("d")
+            new_texts = []
+            for n in range(l):
+                p = n - 1 if n else l - 1
+                if self._segment_equal(n, offsets[n], p, offsets[p],
+                                       tidx[n], tidx[p]):
+                    continue
+                op = ops[n]
+                new_ops.append(op)
+                new_coords.extend(coords[offsets[n]:offsets[n]+NCOORDS[op]])
+                if op == TEXT:
+                    new_texts.append(self.texts[tidx[n]])
+            self.ops, self.coords, self.texts = new_ops, new_coords, new_texts
 
 class Context:
     def __init__(self, surface, *al, **ad) -> None:
@@ -238,9 +499,10 @@ class Context:
         self._padding = PADDING
 
         self._stack: list[Any] = []
-        self._m = Affine.translation(0, 0)
+        # current transformation as (a, b, c, d, e, f) like in Affine
+        self._m = (1.0, 0.0, 0.0, 0.0, 1.0, 0.0)
         self._xy = (0, 0)
-        self._mxy = self._m * self._xy
+        self._mxy = (0.0, 0.0)
         self._lw = 0
         self._rgb = (0, 0, 0)
         self._ff = "sans-serif"
@@ -268,15 +530,41 @@ class Context:
 
     ## transformations
 
+    def _transform(self, oa, ob, oc, od, oe, of):
+        sa, sb, sc, sd, se, sf = self._m
+        self._m = (sa * oa + sb * od, sa * ob + sb * oe, sa * oc + sb * of + sc,
+                   sd * oa + se * od, sd * ob + se * oe, sd * oc + se * of + sf)
+
+    def _apply(self, x, y):
+        a, b, c, d, e, f = self._m
+        return (x * a + y * b + c, x * d + y * e + f)
+
     def translate(self, x, y):
-        self._m *= Affine.translation(x, y)
+        a, b, c, d, e, f = self._m
+        # same as _transform(1.0, 0.0, x, 0.0, 1.0, y) incl. signed zeros
+        self._m = (a + b * 0.0, a * 0.0 + b, a * x + b * y + c,
+                   d + e * 0.0, d * 0.0 + e, d * x + e * y + f)
         self._xy = (0, 0)
 
     def scale(self, sx, sy):
-        self._m *= Affine.scale(sx, sy)
+        self._transform(sx, 0.0, 0.0, 0.0, sy, 0.0)
+
+    # cos and sin of right angles - same special cases as in affine
+    _right_angles = {
+        90.0: (0.0, 1.0),
+        180.0: (-1.0, 0.0),
+        270.0: (0.0, -1.0),
+    }
 
     def rotate(self, r):
-        self._m *= Affine.rotation(180 * r / math.pi)
+        deg = (180 * r / math.pi) % 360.0
+        if deg in self._right_angles:
+            ca, sa = self._right_angles[deg]
+            self._transform(ca, 0.0 - sa, 0.0, sa, ca, 0.0)
+        else:
+            rad = math.radians(deg)
+            ca, sa = math.cos(rad), math.sin(rad)
+            self._transform(ca, -sa, 0.0, sa, ca, 0.0)
 
     def set_line_width(self, lw):
         self._lw = lw
@@ -290,7 +578,7 @@ class Context:
         self._add_move()
         x1, y1 = self._mxy
         self._xy = x, y
-        x2, y2 = self._mxy = self._m * self._xy
+        x2, y2 = self._mxy = self._apply(x, y)
         if not points_equal(x1, y1, x2, y2):
             self._dwg.append("L", x2, y2)
 
@@ -299,7 +587,7 @@ class Context:
 
     def move_to(self, x, y):
         self._xy = (x, y)
-        self._mxy = self._m * self._xy
+        self._mxy = self._apply(x, y)
 
     def line_to(self, x, y):
         self._line_to(x, y)
@@ -324,11 +612,9 @@ class Context:
         x3 = xc + bx + k2 * by
         y3 = yc + by - k2 * bx
 
-        mx1, my1 = self._m * (x1, y1)
-        mx2, my2 = self._m * (x2, y2)
-        mx3, my3 = self._m * (x3, y3)
-        mx4, my4 = self._m * (x4, y4)
-        mxc, myc = self._m * (xc, yc)
+        mx2, my2 = self._apply(x2, y2)
+        mx3, my3 = self._apply(x3, y3)
+        mx4, my4 = self._apply(x4, y4)
 
         self._add_move()
         self._dwg.append("C", mx4, my4, mx2, my2, mx3, my3)
@@ -342,10 +628,9 @@ class Context:
         self._arc(xc, yc, radius, angle1, angle2, -1)
 
     def curve_to(self, x1, y1, x2, y2, x3, y3):
-        # mx0,my0 = self._m*self._xy
-        mx1, my1 = self._m * (x1, y1)
-        mx2, my2 = self._m * (x2, y2)
-        mx3, my3 = self._m * (x3, y3)
+        mx1, my1 = self._apply(x1, y1)
+        mx2, my2 = self._apply(x2, y2)
+        mx3, my3 = self._apply(x3, y3)
         self._add_move()
         self._dwg.append("C", mx3, my3, mx1, my1, mx2, my2)  # destination first!
         self._xy = (x3, y3)
@@ -371,8 +656,8 @@ class Context:
     def show_text(self, text, **args):
         params = {"ff": self._ff, "fs": self._fs, "lw": self._lw, "rgb": self._rgb}
         params.update(args)
-        mx0, my0 = self._m * self._xy
-        m = self._m
+        mx0, my0 = self._apply(*self._xy)
+        m = Affine(*self._m)
         self._dwg.append("T", mx0, my0, m, text, params)
 
     def text_extents(self, text):
@@ -488,6 +773,17 @@ class SVGSurface(Surface):
         root.insert(0, m)
 
     def finish(self, inner_corners="loop"):
+        f = io.BytesIO()
+        self.write(f, inner_corners)
+        f.seek(0)
+        return f
+
+    def stream(self, inner_corners="loop"):
+        """Generate the SVG document part by part
+
+        Only the element of the part currently written is held in memory.
+        The output is identical to serialising the whole tree at once.
+        """
         extents = self._adjust_coordinates()
         w = extents.width * self.scale
         h = extents.height * self.scale
@@ -509,15 +805,26 @@ class SVGSurface(Surface):
         for name, value in nsmap.items():
             svg.set(f"xmlns:{name}", value)
         svg.text = "\n"
-        tree = ET.ElementTree(svg)
 
         self._add_metadata(svg)
 
+        # write the start tag of the root and the meta data first
+        header = list(svg)
+        for el in header:
+            svg.remove(el)
+        reorder_attributes(svg)
+        start = ET.tostring(svg, encoding="unicode")[:-len("</svg>")]
+        chunks = ["<?xml version='1.0' encoding='utf-8'?>\n", start]
+        for el in header:
+            reorder_attributes(el)
+            chunks.append(ET.tostring(el, encoding="unicode"))
+        yield "".join(chunks).encode("utf-8", "xmlcharrefreplace")
+
         for i, part in enumerate(self.parts):
             if not part.pathes:
                 continue
-            g = ET.SubElement(svg, "g", id=f"p-{i}",
-                              style="fill:none;stroke-linecap:round;stroke-linejoin:round;")
+            g = ET.Element("g", id=f"p-{i}",
+                           style="fill:none;stroke-linecap:round;stroke-linejoin:round;")
             g.text = "\n  "
             g.tail = "\n"
             for j, path in enumerate(part.pathes):
@@ -526,7 +833,7 @@ class SVGSurface(Surface):
                 start = None
                 last = None
                 path.faster_edges(inner_corners)
-                for c in path.path:
+                for c in path.segments():
                     x0, y0 = x, y
                     C, x, y = c[0:3]
                     if C == "M":
@@ -583,12 +890,12 @@ class SVGSurface(Surface):
                     t = ET.SubElement(g, "path", d=" ".join(p), stroke=color)
                     t.set("stroke-width", f'{path.params["lw"]:.2f}')
                     t.tail = "\n  "
-            t.tail = "\n"
-        reorder_attributes(tree)
-        f = io.BytesIO()
-        tree.write(f, encoding="utf-8", xml_declaration=True, method="xml")
-        f.seek(0)
-        return f
+            if len(g):
+                g[-1].tail = "\n"
+            reorder_attributes(g)
+            yield ET.tostring(g, encoding="unicode").encode(
+                "utf-8", "xmlcharrefreplace")
+        yield b"</svg>"
 
 class PSSurface(Surface):
 
@@ -638,13 +945,18 @@ class PSSurface(Surface):
         return desc
 
     def finish(self, inner_corners="loop"):
+        f = io.BytesIO()
+        self.write(f, inner_corners)
+        f.seek(0)
+        return f
 
+    def stream(self, inner_corners="loop"):
+        """Generate the EPS document with one chunk per part"""
         extents = self._adjust_coordinates()
         w = extents.width
         h = extents.height
 
-        data = io.BytesIO()
-        f = codecs.getwriter('utf-8')(data)
+        f = io.StringIO()
 
         f.write(f"""%!PS-Adobe-2.0 EPSF-2.0
 %%BoundingBox: 0 0 {w:.0f} {h:.0f}
@@ -674,16 +986,18 @@ class PSSurface(Surface):
         # f.write(f"%%DocumentMedia: \d+x\d+mm ((\d+) (\d+)) 0 \("
         # dwg['width']=f'{w:.2f}mm'
         # dwg['height']=f'{h:.2f}mm'
+        yield f.getvalue().encode("utf-8")
 
         for i, part in enumerate(self.parts):
             if not part.pathes:
                 continue
+            f = io.StringIO()
             for j, path in enumerate(part.pathes):
                 p = []
                 x, y = 0, 0
                 path.faster_edges(inner_corners)
 
-                for c in path.path:
+                for c in path.segments():
                     x0, y0 = x, y
                     C, x, y = c[0:3]
                     if C == "M":
@@ -737,15 +1051,167 @@ class PSSurface(Surface):
                     f.write(f"{path.params['lw']} setlinewidth\n")
                     f.write(f"{color} setrgbcolor\n")
                     f.write("stroke\n\n")
-        f.write(
-            """
+            yield f.getvalue().encode("utf-8")
+        yield b"""
 showpage
 %%Trailer
 %%EOF
 """
-        )
-        data.seek(0)
-        return data
+
+class PDFSurface(Surface):
+    """Writes a single page PDF
+
+    The content stream is generated part by part and compressed with zlib
+    if .compress is set. There are no font metrics available so centred and
+    right aligned texts are positioned using an estimated text width.
+    """
+
+    scale = 72 / 25.4 # 72 dpi
+    compress = True
+
+    fonts = PSSurface.fonts
+
+    # descender and average character width relative to the font size
+    font_metrics = {
+        'serif' : (0.218, 0.5),
+        'sans-serif' : (0.225, 0.5),
+        'monospaced' : (0.25, 0.6),
+    }
+
+    @staticmethod
+    def _string(text):
+        text = text.encode("cp1252", "replace").decode("latin-1")
+        text = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+        return f"({text})".replace("\r", "\\r").replace("\n", "\\n")
+
+    def _info(self):
+        md = self.metadata
+        info = {
+            "Title": "Boxes.py - {group} - {name}".format(**md),
+            "Subject": md["short_description"] or "",
+            "Keywords": "boxes.py, laser, laser cutter",
+            "Creator": md.get("url") or md["cli"],
+            "Producer": "Boxes.py (https://boxes.hackerspace-bamberg.de/)",
+        }
+        entries = [f"/{k} {self._string(v)}" for k, v in info.items()]
+        if not md["reproducible"]:
+            entries.append(f'/CreationDate (D:{md["creation_date"].strftime("%Y%m%d%H%M%S")})')
+        return "<< " + " ".join(entries) + " >>"
+
+    def _text(self, x, y, m, text, params, fonts):
+        font, bold, italic = params['ff']
+        name = self.fonts[params['ff']]
+        if name not in fonts:
+            fonts[name] = f"F{len(fonts)+1}"
+        fs = params['fs']
+        descender, width = self.font_metrics[font]
+        dx = {
+            'left' : 0.0,
+            'middle' : -0.5,
+            'end' : -1.0,
+        }[params.get('align', 'left')] * len(text) * width * fs
+        tm = " ".join(f"{m[i]:.3f}" for i in (0, 3, 1, 4, 2, 5))
+        color = " ".join(f"{c:.2f}" for c in params["rgb"])
+        return (f"BT\n{color} rg\n/{fonts[name]} {fs} Tf\n{tm} Tm\n"
+                f"{dx:.3f} {descender*fs:.3f} Td\n{self._string(text)} Tj\nET\n")
+
+    def finish(self, inner_corners="loop"):
+        f = io.BytesIO()
+        self.write(f, inner_corners)
+        f.seek(0)
+        return f
+
+    def stream(self, inner_corners="loop"):
+        """Generate the PDF document with one chunk per part"""
+        extents = self._adjust_coordinates()
+        w = extents.width
+        h = extents.height
+
+        offsets = {}
+        pos = 0
+
+        def obj(num, content):
+            nonlocal pos
+            offsets[num] = pos
+            data = f"{num} 0 obj\n{content}\nendobj\n".encode("latin-1")
+            pos += len(data)
+            return data
+
+        # objects: 1 catalog, 2 pages, 3 page, 4 content, 5 content length,
+        # 6 info, 7... fonts
+        head = "%PDF-1.4\n%\xe2\xe3\xcf\xd3\n".encode("latin-1")
+        pos = len(head)
+        offsets[4] = pos
+        filter = " /Filter /FlateDecode" if self.compress else ""
+        start = f"4 0 obj\n<< /Length 5 0 R{filter} >>\nstream\n".encode("latin-1")
+        yield head + start
+        pos += len(start)
+
+        compressor = zlib.compressobj() if self.compress else None
+        length = 0
+        fonts: dict[str, str] = {}
+
+        def content(text):
+            nonlocal pos, length
+            data = text.encode("latin-1", "replace")
+            if compressor:
+                data = compressor.compress(data)
+            pos += len(data)
+            length += len(data)
+            return data
+
+        yield content("1 J\n1 j\n")
+        for i, part in enumerate(self.parts):
+            if not part.pathes:
+                continue
+            p = []
+            for j, path in enumerate(part.pathes):
+                path.faster_edges(inner_corners)
+                segments = []
+                for c in path.segments():
+                    C, x, y = c[0:3]
+                    if C == "M":
+                        segments.append(f"{x:.3f} {y:.3f} m")
+                    elif C == "L":
+                        segments.append(f"{x:.3f} {y:.3f} l")
+                    elif C == "C":
+                        x1, y1, x2, y2 = c[3:]
+                        segments.append(
+                            f"{x1:.3f} {y1:.3f} {x2:.3f} {y2:.3f} {x:.3f} {y:.3f} c")
+                    elif C == "T":
+                        p.append(self._text(*c[1:], fonts))
+                    else:
+                        print("Unknown", c)
+                if segments:
+                    color = " ".join(f"{c:.2f}" for c in path.params["rgb"])
+                    p.append(f"{path.params['lw']:.3f} w\n{color} RG\n")
+                    p.append("\n".join(segments))
+                    p.append("\nS\n")
+            yield content("".join(p))
+        tail = compressor.flush() if compressor else b""
+        pos += len(tail)
+        length += len(tail)
+        tail += b"\nendstream\nendobj\n"
+        pos += len(b"\nendstream\nendobj\n")
+
+        font_objs = {name: 7 + n for n, name in enumerate(fonts)}
+        resources = " ".join(f"/{fonts[name]} {num} 0 R" for name, num in font_objs.items())
+        tail += obj(5, str(length))
+        tail += obj(3, f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {w:.3f} {h:.3f}]"
+                       f" /Resources << /Font << {resources} >> >> /Contents 4 0 R >>")
+        tail += obj(2, "<< /Type /Pages /Kids [3 0 R] /Count 1 >>")
+        tail += obj(1, "<< /Type /Catalog /Pages 2 0 R >>")
+        tail += obj(6, self._info())
+        for name, num in font_objs.items():
+            tail += obj(num, f"<< /Type /Font /Subtype /Type1 /BaseFont /{name}"
+                             " /Encoding /WinAnsiEncoding >>")
+        size = 7 + len(font_objs)
+        xref = [f"xref\n0 {size}\n", "0000000000 65535 f \n"]
+        for num in range(1, size):
+            xref.append(f"{offsets[num]:010d} 00000 n \n")
+        xref.append(f"trailer\n<< /Size {size} /Root 1 0 R /Info 6 0 R >>\n"
+                    f"startxref\n{pos}\n%%EOF\n")
+        yield tail + "".join(xref).encode("latin-1")
 
 class LBRN2Surface(Surface):
 
@@ -844,23 +1310,24 @@ class LBRN2Surface(Surface):
                 start = None
                 last = None
                 path.faster_edges(inner_corners)
+                segments = path.path
                 num = 0
                 cnt = 1
-                end = len(path.path) - 1
+                end = len(segments) - 1
                 if self.dbg:
-                    for c in path.path:
+                    for c in segments:
                         print ("6",num, c)
                         num += 1
                     num = 0
 
-                c = path.path[num]
+                c = segments[num]
                 C, x, y = c[0:3]
                 if self.dbg:
                     print("end:", end)
                 while num < end or (C == "T" and num <= end):  # len(path.path):
                     if self.dbg:
                         print("0", num)
-                    c = path.path[num]
+                    c = segments[num]
                     if self.dbg: print("first: ", num, c)
 
                     C, x, y = c[0:3]
@@ -882,7 +1349,7 @@ class LBRN2Surface(Surface):
                         bspline = False
                         while done == False and num < end:  # len(path.path):
                             num += 1
-                            c = path.path[num]
+                            c = segments[num]
                             if self.dbg: print ("next: ",num, c)
                             C, x, y = c[0:3]
                             if C == "M":
@@ -1004,6 +1471,363 @@ class LBRN2Surface(Surface):
         f.seek(0)
         return f
 
+class DXFSurface(Surface):
+    """Writes DXF R12 (AC1009) with one layer per colour
+
+    R12 needs no entity handles and is read by virtually all CAD and laser
+    software. Lines are grouped into POLYLINE entities, curves become ARC
+    entities if they are circular and are flattened into the polyline
+    otherwise (deviating at most .tolerance mm). Units are mm.
+    """
+
+    invert_y = False
+    tolerance = 0.01
+
+    # layer name and AutoCAD colour index
+    layers = {
+        (0.0, 0.0, 0.0) : ("OUTER_CUT", 7),
+        (0.0, 0.0, 1.0) : ("INNER_CUT", 5),
+        (1.0, 0.0, 0.0) : ("ANNOTATIONS", 1),
+        (0.0, 1.0, 0.0) : ("ETCHING", 3),
+        (0.0, 1.0, 1.0) : ("ETCHING_DEEP", 4),
+        (1.0, 1.0, 0.0) : ("YELLOW", 2),
+        (1.0, 0.0, 1.0) : ("MAGENTA", 6),
+        (1.0, 1.0, 1.0) : ("WHITE", 8),
+    }
+
+    def _layer(self, rgb):
+        rgb = tuple(float(c) for c in rgb)
+        if rgb in self.layers:
+            return self.layers[rgb]
+        r, g, b = (round(c * 255) for c in rgb)
+        return f"RGB_{r}_{g}_{b}", 7
+
+    @staticmethod
+    def _text(text):
+        text = text.replace("\r", "").replace("\n", " ")
+        return "".join(c if ord(c) < 128 else f"\\U+{ord(c):04X}"
+                       for c in text)
+
+    def _header(self, extents):
+        pathes = self._all_pathes()
+        layers = {self._layer(path.params["rgb"]) for path in pathes}
+        for path in pathes:
+            for m, text, params in path.texts:
+                layers.add(self._layer(params["rgb"]))
+        layers.add(("0", 7))
+        out = [
+            "0", "SECTION", "2", "HEADER",
+            "9", "$ACADVER", "1", "AC1009",
+            "9", "$INSUNITS", "70", "4",
+            "9", "$EXTMIN", "10", "0.0", "20", "0.0", "30", "0.0",
+            "9", "$EXTMAX", "10", f"{extents.width:.3f}",
+            "20", f"{extents.height:.3f}", "30", "0.0",
+            "0", "ENDSEC",
+            "0", "SECTION", "2", "TABLES",
+            "0", "TABLE", "2", "LTYPE", "70", "1",
+            "0", "LTYPE", "2", "CONTINUOUS", "70", "0",
+            "3", "Solid line", "72", "65", "73", "0", "40", "0.0",
+            "0", "ENDTAB",
+            "0", "TABLE", "2", "LAYER", "70", str(len(layers)),
+        ]
+        for name, color in sorted(layers):
+            out.extend(["0", "LAYER", "2", name, "70", "0",
+                        "62", str(color), "6", "CONTINUOUS"])
+        out.extend(["0", "ENDTAB", "0", "ENDSEC",
+                    "0", "SECTION", "2", "ENTITIES"])
+        return out
+
+    def _lines(self, out, layer, points):
+        if len(points) < 2:
+            return
+        if len(points) == 2:
+            (x1, y1), (x2, y2) = points
+            out.extend(["0", "LINE", "8", layer,
+                        "10", f"{x1:.3f}", "20", f"{y1:.3f}", "30", "0.0",
+                        "11", f"{x2:.3f}", "21", f"{y2:.3f}", "31", "0.0"])
+            return
+        closed = points_equal(*points[0], *points[-1])
+        if closed:
+            points = points[:-1]
+        out.extend(["0", "POLYLINE", "8", layer, "66", "1",
+                    "10", "0.0", "20", "0.0", "30", "0.0",
+                    "70", "1" if closed else "0"])
+        for x, y in points:
+            out.extend(["0", "VERTEX", "8", layer,
+                        "10", f"{x:.3f}", "20", f"{y:.3f}", "30", "0.0"])
+        out.extend(["0", "SEQEND", "8", layer])
+
+    def _arc(self, out, layer, cx, cy, r, a1, a2):
+        out.extend(["0", "ARC", "8", layer,
+                    "10", f"{cx:.3f}", "20", f"{cy:.3f}", "30", "0.0",
+                    "40", f"{r:.3f}", "50", f"{a1:.3f}", "51", f"{a2:.3f}"])
+
+    def _show_text(self, out, x, y, m, text, params):
+        text = self._text(text)
+        if not text:
+            return
+        layer, _ = self._layer(params["rgb"])
+        angle = math.degrees(math.atan2(m[3], m[0]))
+        h = params["fs"] * (m[0]**2 + m[3]**2)**0.5
+        align = {"left": 0, "middle": 1, "end": 2}[params.get("align", "left")]
+        out.extend(["0", "TEXT", "8", layer,
+                    "10", f"{x:.3f}", "20", f"{y:.3f}", "30", "0.0",
+                    "40", f"{h:.3f}", "1", text, "50", f"{angle:.3f}",
+                    "72", str(align),
+                    "11", f"{x:.3f}", "21", f"{y:.3f}", "31", "0.0",
+                    "73", "1"])
+
+    def finish(self, inner_corners="loop"):
+        f = io.BytesIO()
+        self.write(f, inner_corners)
+        f.seek(0)
+        return f
+
+    def stream(self, inner_corners="loop"):
+        """Generate the DXF document with one chunk per part"""
+        extents = self._adjust_coordinates()
+        yield self._chunk(self._header(extents))
+
+        for part in self.parts:
+            out: list[str] = []
+            for path in part.pathes:
+                path.faster_edges(inner_corners)
+                layer, _ = self._layer(path.params["rgb"])
+                points: list[tuple[float, float]] = []
+                for c in path.segments():
+                    C, x, y = c[0:3]
+                    if C == "M":
+                        self._lines(out, layer, points)
+                        points = [(x, y)]
+                    elif C == "L":
+                        points.append((x, y))
+                    elif C == "C":
+                        x0, y0 = points[-1]
+                        arc = bezier_to_arc(x0, y0, *c[3:], x, y)
+                        if arc:
+                            self._lines(out, layer, points)
+                            self._arc(out, layer, *arc)
+                            points = [(x, y)]
+                        else:
+                            points.extend(flatten_bezier(
+                                x0, y0, *c[3:], x, y, self.tolerance))
+                            points.append((x, y))
+                    elif C == "T":
+                        self._lines(out, layer, points)
+                        self._show_text(out, *c[1:])
+                        points = [(x, y)]
+                    else:
+                        print("Unknown", c)
+                self._lines(out, layer, points)
+            if out:
+                yield self._chunk(out)
+        yield self._chunk(["0", "ENDSEC", "0", "EOF"])
+
+    @staticmethod
+    def _chunk(out):
+        return ("\n".join(out) + "\n").encode("ascii", "replace")
+
+class PlotterSurface(Surface):
+    """Base for formats that move a tool along flattened polylines
+
+    Curves are approximated by lines deviating at most .tolerance mm.
+    Colours are processed in the order of .color_order (etching first,
+    outer cuts last) and within each colour the polylines are ordered
+    to keep the travel between them short.
+    """
+
+    invert_y = False
+    tolerance = 0.01
+
+    color_order = [
+        (0.0, 1.0, 0.0), # Color.ETCHING
+        (0.0, 1.0, 1.0), # Color.ETCHING_DEEP
+        (1.0, 0.0, 1.0), # Color.MAGENTA
+        (1.0, 1.0, 0.0), # Color.YELLOW
+        (1.0, 1.0, 1.0), # Color.WHITE
+        None,            # all other colours
+        (0.0, 0.0, 1.0), # Color.INNER_CUT
+        (0.0, 0.0, 0.0), # Color.OUTER_CUT
+        (1.0, 0.0, 0.0), # Color.ANNOTATIONS
+    ]
+
+    def configure(self, tolerance=None, **settings):
+        if tolerance is not None:
+            self.tolerance = tolerance
+
+    def _color_rank(self, rgb):
+        if rgb in self.color_order:
+            return self.color_order.index(rgb)
+        return self.color_order.index(None)
+
+    def _polylines(self, inner_corners):
+        """Return {rgb : [polyline, ...]} and list of texts"""
+        polylines: dict[tuple, list] = {}
+        texts = []
+        for part in self.parts:
+            for path in part.pathes:
+                path.faster_edges(inner_corners)
+                rgb = tuple(float(c) for c in path.params["rgb"])
+                lines = polylines.setdefault(rgb, [])
+                points: list[tuple[float, float]] = []
+                for c in path.segments():
+                    C, x, y = c[0:3]
+                    if C == "M":
+                        if len(points) > 1:
+                            lines.append(points)
+                        points = [(x, y)]
+                    elif C == "L":
+                        points.append((x, y))
+                    elif C == "C":
+                        x0, y0 = points[-1]
+                        points.extend(flatten_bezier(
+                            x0, y0, *c[3:], x, y, self.tolerance))
+                    elif C == "T":
+                        m, text, params = c[3:]
+                        texts.append((tuple(float(c) for c in params["rgb"]),
+                                      x, y, m, text, params))
+                    else:
+                        print("Unknown", c)
+                if len(points) > 1:
+                    lines.append(points)
+        return polylines, texts
+
+    def jobs(self, inner_corners="loop"):
+        """Return list of (rgb, polylines) in processing order"""
+        polylines, self._texts = self._polylines(inner_corners)
+        pos = (0.0, 0.0)
+        result = []
+        for rgb in sorted(polylines, key=self._color_rank):
+            lines = order_polylines(polylines[rgb], pos)
+            if lines:
+                pos = lines[-1][-1]
+                result.append((rgb, lines))
+        return result
+
+    def finish(self, inner_corners="loop"):
+        f = io.BytesIO()
+        self.write(f, inner_corners)
+        f.seek(0)
+        return f
+
+
+class HPGLSurface(PlotterSurface):
+    """HP-GL for pen plotters and cutters
+
+    Every colour gets its own pen. Optional pen speeds (in cm/s) can be
+    set per colour in .speeds.
+    """
+
+    units = 40 # plotter units per mm
+
+    pens = {
+        (0.0, 0.0, 0.0) : 1, # Color.OUTER_CUT
+        (0.0, 0.0, 1.0) : 2, # Color.INNER_CUT
+        (0.0, 1.0, 0.0) : 3, # Color.ETCHING
+        (0.0, 1.0, 1.0) : 4, # Color.ETCHING_DEEP
+        (1.0, 0.0, 0.0) : 5, # Color.ANNOTATIONS
+        (1.0, 0.0, 1.0) : 6,
+        (1.0, 1.0, 0.0) : 7,
+        (1.0, 1.0, 1.0) : 8,
+    }
+
+    speeds: dict[tuple, float] = {}
+
+    def configure(self, speed=0.0, **settings):
+        super().configure(**settings)
+        if speed:
+            self.speeds = dict.fromkeys(self.pens, speed)
+
+    def _xy(self, x, y):
+        return f"{round(x * self.units)},{round(y * self.units)}"
+
+    def _label(self, x, y, m, text, params):
+        text = text.replace("\x03", "").replace("\n", " ")
+        if not text:
+            return ""
+        h = params["fs"] * (m[0]**2 + m[3]**2)**0.5 / 10 # in cm
+        origin = {"left": 1, "middle": 4, "end": 7}[params.get("align", "left")]
+        return (f"PU{self._xy(x, y)};DI{m[0]:.3f},{m[3]:.3f};"
+                f"SI{0.5*h:.3f},{0.7*h:.3f};LO{origin};LB{text}\x03\n")
+
+    def stream(self, inner_corners="loop"):
+        """Generate HP-GL with one chunk per pen"""
+        self._adjust_coordinates()
+        yield b"IN;PA;\n"
+        jobs = self.jobs(inner_corners)
+        texts: dict[tuple, list] = {}
+        for text in self._texts:
+            texts.setdefault(text[0], []).append(text[1:])
+        done = set()
+        for rgb, lines in jobs + [(rgb, []) for rgb in texts]:
+            if rgb in done:
+                continue
+            done.add(rgb)
+            out = [f"SP{self.pens.get(rgb, 1)};\n"]
+            if rgb in self.speeds:
+                out.append(f"VS{self.speeds[rgb]};\n")
+            for points in lines:
+                out.append(f"PU{self._xy(*points[0])};")
+                out.append("PD" + ",".join(self._xy(x, y) for x, y in points[1:]))
+                out.append(";\n")
+            for text in texts.get(rgb, ()):
+                out.append(self._label(*text))
+            yield "".join(out).encode("latin-1", "replace")
+        yield b"PU;SP0;\n"
+
+
+class GCodeSurface(PlotterSurface):
+    """G-code for laser cutters in mm
+
+    .settings maps colours to (feed rate in mm/min, laser power S value).
+    Colours mapped to None are not cut. Other colours not listed (e.g.
+    magenta or custom RGB values) use the settings of the outer cut.
+    Texts are only listed as comments.
+    """
+
+    settings: dict[tuple, Any] = {
+        (0.0, 0.0, 0.0) : (600, 1000),  # Color.OUTER_CUT
+        (0.0, 0.0, 1.0) : (600, 1000),  # Color.INNER_CUT
+        (0.0, 1.0, 0.0) : (3000, 300),  # Color.ETCHING
+        (0.0, 1.0, 1.0) : (1500, 600),  # Color.ETCHING_DEEP
+        (1.0, 0.0, 0.0) : None,         # Color.ANNOTATIONS
+    }
+
+    def configure(self, cut=None, etching=None, etching_deep=None, **settings):
+        super().configure(**settings)
+        self.settings = dict(self.settings)
+        for rgb, setting in (((0.0, 0.0, 0.0), cut), ((0.0, 0.0, 1.0), cut),
+                             ((0.0, 1.0, 0.0), etching),
+                             ((0.0, 1.0, 1.0), etching_deep)):
+            if setting is not None:
+                self.settings[rgb] = setting
+
+    def stream(self, inner_corners="loop"):
+        """Generate G-code with one chunk per colour"""
+        self._adjust_coordinates()
+        yield b"G21\nG90\nM5\n"
+        for rgb, lines in self.jobs(inner_corners):
+            setting = self.settings.get(rgb, self.settings[(0.0, 0.0, 0.0)])
+            if setting is None:
+                continue
+            feed, power = setting
+            out = [f"; color {rgb_to_svg_color(*rgb)}\n"]
+            for points in lines:
+                x, y = points[0]
+                out.append(f"G0 X{x:.3f} Y{y:.3f}\nM3 S{power}\n")
+                x, y = points[1]
+                out.append(f"G1 X{x:.3f} Y{y:.3f} F{feed}\n")
+                for x, y in points[2:]:
+                    out.append(f"G1 X{x:.3f} Y{y:.3f}\n")
+                out.append("M5\n")
+            yield "".join(out).encode("ascii")
+        out = []
+        for rgb, x, y, m, text, params in self._texts:
+            text = text.replace("\n", " ").encode("ascii", "replace").decode()
+            out.append(f"; text at X{x:.3f} Y{y:.3f}: {text}\n")
+        out.append("G0 X0 Y0\nM2\n")
+        yield "".join(out).encode("ascii")
+
 from random import random
 
 
@@ -1045,3 +1869,105 @@ def line_intersection(line1, line2):
     )
 
     return min(on_segments), x, y
+
+
+def bezier_to_arc(x0, y0, x1, y1, x2, y2, x3, y3, tolerance=1e-3):
+    """Return (cx, cy, r, start_angle, end_angle) if the cubic Bézier curve
+    is a circular arc. The arc runs counter clockwise from start to end
+    angle (in degrees). Return None otherwise."""
+    # normals at both ends
+    n0x, n0y = y0 - y1, x1 - x0
+    n3x, n3y = y2 - y3, x3 - x2
+    div = n3x * n0y - n0x * n3y
+    if abs(div) < EPS:
+        return None
+    s = ((x3 - x0) * -n3y + n3x * (y3 - y0)) / div
+    cx, cy = x0 + s * n0x, y0 + s * n0y
+    r = dist(x0 - cx, y0 - cy)
+    mx = (x0 + 3 * x1 + 3 * x2 + x3) / 8
+    my = (y0 + 3 * y1 + 3 * y2 + y3) / 8
+    if (abs(dist(x3 - cx, y3 - cy) - r) > tolerance or
+        abs(dist(mx - cx, my - cy) - r) > tolerance):
+        return None
+    a0 = math.degrees(math.atan2(y0 - cy, x0 - cx))
+    a3 = math.degrees(math.atan2(y3 - cy, x3 - cx))
+    if (x0 - cx) * (y1 - y0) - (y0 - cy) * (x1 - x0) > 0:
+        return cx, cy, r, a0, a3
+    return cx, cy, r, a3, a0
+
+
+def dist(dx, dy):
+    return (dx * dx + dy * dy) ** 0.5
+
+
+def flatten_bezier(x0, y0, x1, y1, x2, y2, x3, y3, tolerance):
+    """Return points approximating the cubic Bézier curve (excluding the
+    start point) with a maximal deviation of tolerance"""
+    ddx = max(abs(x0 - 2 * x1 + x2), abs(x1 - 2 * x2 + x3))
+    ddy = max(abs(y0 - 2 * y1 + y2), abs(y1 - 2 * y2 + y3))
+    n = max(1, math.ceil((0.75 * dist(ddx, ddy) / tolerance) ** 0.5))
+    points = []
+    for i in range(1, n):
+        t = i / n
+        u = 1 - t
+        a, b, c, d = u * u * u, 3 * u * u * t, 3 * u * t * t, t * t * t
+        points.append((a * x0 + b * x1 + c * x2 + d * x3,
+                       a * y0 + b * y1 + c * y2 + d * y3))
+    points.append((x3, y3))
+    return points
+
+
+def order_polylines(polylines, pos=(0.0, 0.0)):
+    """Order polylines greedily by the distance from the end of the previous
+    one. Open polylines may be reversed. Uses a grid for finding the nearest
+    end points."""
+    n = len(polylines)
+    if n == 0:
+        return []
+    xs = [p[0] for pl in polylines for p in (pl[0], pl[-1])]
+    ys = [p[1] for pl in polylines for p in (pl[0], pl[-1])]
+    size = max(max(xs) - min(xs), max(ys) - min(ys)) / n**0.5 or 1.0
+
+    def cell(x, y):
+        return math.floor(x / size), math.floor(y / size)
+
+    grid: dict[tuple[int, int], list] = {}
+    ends = []
+    for i, pl in enumerate(polylines):
+        e = [(pl[0], False)]
+        if not points_equal(*pl[0], *pl[-1]):
+            e.append((pl[-1], True))
+        ends.append(e)
+        for p, reverse in e:
+            grid.setdefault(cell(*p), []).append((i, reverse))
+
+    result = []
+    for _ in range(n):
+        cx, cy = cell(*pos)
+        best = None
+        r = 0
+        while True:
+            if r == 0:
+                cells = [(cx, cy)]
+            else:
+                cells = [(cx + dx, cy + dy) for dx in range(-r, r + 1)
+                         for dy in (-r, r)]
+                cells += [(cx + dx, cy + dy) for dx in (-r, r)
+                          for dy in range(-r + 1, r)]
+            for c in cells:
+                for i, reverse in grid.get(c, ()):
+                    x, y = polylines[i][-1 if reverse else 0]
+                    d = (x - pos[0])**2 + (y - pos[1])**2
+                    if best is None or d < best[0]:
+                        best = (d, i, reverse)
+            # everything outside the searched rings is further away
+            if best is not None and best[0] <= (r * size)**2:
+                break
+            r += 1
+        _, i, reverse = best
+        for p, rev in ends[i]:
+            grid[cell(*p)].remove((i, rev))
+        pl = polylines[i][::-1] if reverse else polylines[i]
+        result.append(pl)
+        pos = pl[-1]
+    return result
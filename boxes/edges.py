@@ -21,8 +21,6 @@ import re
 from abc import ABC, abstractmethod
 from typing import Any
 
-from boxes import gears
-
 
 def argparseSections(s: str) -> list[float]:
     """
@@ -169,20 +167,27 @@ class Settings:
     relative_params: dict[str, Any] = {}  # TODO find better typing.
 
     @classmethod
-    def parserArguments(cls, parser, prefix=None, **defaults):
-        prefix = prefix or cls.__name__[:-len("Settings")]
-
+    def _parseDoc(cls) -> tuple[str, dict[str, str]]:
+        """Return group title and argument descriptions from the doc string"""
+        cached = cls.__dict__.get("_docinfo")
+        if cached is not None:
+            return cached
         lines = cls.__doc__.split("\n")
-
-        # Parse doc string
         descriptions = {}
         r = re.compile(r"^ +\* +(\S+) +: .* : +(.*)")
         for l in lines:
             m = r.search(l)
             if m:
                 descriptions[m.group(1)] = m.group(2)
+        cls._docinfo = (lines[0] or lines[1], descriptions)
+        return cls._docinfo
+
+    @classmethod
+    def parserArguments(cls, parser, prefix=None, **defaults):
+        prefix = prefix or cls.__name__[:-len("Settings")]
 
-        group = parser.add_argument_group(lines[0] or lines[1])
+        title, descriptions = cls._parseDoc()
+        group = parser.add_argument_group(title)
         group.prefix = prefix
         for name, default in (sorted(cls.absolute_params.items()) +
                               sorted(cls.relative_params.items())):
@@ -2484,6 +2489,7 @@ class RackEdge(BaseEdge):
 
     def __init__(self, boxes, settings) -> None:
         super().__init__(boxes, settings)
+        from boxes import gears
         self.gear = gears.Gears(boxes)
 
     def __call__(self, length, **kw):
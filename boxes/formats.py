@@ -19,34 +19,54 @@ import shutil
 import subprocess
 import tempfile
 import io
-from boxes.drawing import Context, LBRN2Surface, PSSurface, SVGSurface
+import zlib
+from boxes.drawing import (Context, DXFSurface, GCodeSurface, HPGLSurface, LBRN2Surface,
+                           PDFSurface, PSSurface, SVGSurface)
+
+
+def gzip_chunks(chunks, level=6):
+    """Compress an iterable of bytes chunks into gzip format on the fly"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: gzip header
+    for chunk in chunks:
+        chunk = compressor.compress(chunk)
+        if chunk:
+            yield chunk
+    yield compressor.flush()
 
 
 class Formats:
 
+    _pstoedit: str | None | bool = False  # False: not searched yet
     pstoedit_candidates = ["/usr/bin/pstoedit", "pstoedit", r"C:\Program Files\pstoedit\pstoedit.exe", "pstoedit.exe"]
-    ps2pdf_candidates = ["/usr/bin/ps2pdf", "ps2pdf", "ps2pdf.exe"]
 
-    _BASE_FORMATS = ['svg', 'svg_Ponoko', 'ps', 'lbrn2']
+    _BASE_FORMATS = ['svg', 'svg_Ponoko', 'svgz', 'ps', 'lbrn2', 'dxf', 'pdf', 'plt', 'gcode']
+    # formats written gzip compressed
+    _COMPRESSED_FORMATS = ['svgz']
 
+    # None for formats written natively. Other formats can be added as
+    # command line that converts PostScript - see .convert() and the
+    # commented out "ai" entry. These are offered if pstoedit is found.
     formats = {
         "svg": None,
         "svg_Ponoko": None,
+        "svgz": None,
         "ps": None,
         "lbrn2": None,
-        "dxf": "{pstoedit} -flat 0.1 -f dxf:-mm {input} {output}",
-        "gcode": "{pstoedit} -f gcode {input} {output}",
-        "plt": "{pstoedit} -f hpgl {input} {output}",
+        "dxf": None,
+        "gcode": None,
+        "plt": None,
         # "ai": "{pstoedit} -f ps2ai",
-        "pdf": "{ps2pdf} -dEPSCrop {input} {output}",
+        "pdf": None,
     }
 
     http_headers = {
         "svg": [('Content-type', 'image/svg+xml; charset=utf-8')],
         "svg_Ponoko": [('Content-type', 'image/svg+xml; charset=utf-8')],
+        "svgz": [('Content-type', 'application/gzip')],
         "ps": [('Content-type', 'application/postscript')],
         "lbrn2": [('Content-type', 'application/lbrn2')],
         "dxf": [('Content-type', 'image/vnd.dxf')],
+        "pdf": [('Content-type', 'application/pdf')],
         "plt": [('Content-type', ' application/vnd.hp-hpgl')],
         "gcode": [('Content-type', 'text/plain; charset=utf-8')],
 
@@ -54,14 +74,14 @@ class Formats:
     }
 
     def __init__(self) -> None:
-        for cmd in self.pstoedit_candidates:
-            self.pstoedit = shutil.which(cmd)
-            if self.pstoedit:
-                break
-        for cmd in self.ps2pdf_candidates:
-            self.ps2pdf = shutil.which(cmd)
-            if self.ps2pdf:
-                break
+        # Searching the PATH is slow - do it once per process
+        if Formats._pstoedit is False:
+            Formats._pstoedit = None
+            for cmd in self.pstoedit_candidates:
+                Formats._pstoedit = shutil.which(cmd)
+                if Formats._pstoedit:
+                    break
+        self.pstoedit = Formats._pstoedit
 
     def getFormats(self):
         if self.pstoedit:
@@ -69,41 +89,74 @@ class Formats:
         return self._BASE_FORMATS
 
     def getSurface(self, fmt):
-        if fmt in ("svg", "svg_Ponoko"):
+        if fmt in ("svg", "svg_Ponoko", "svgz"):
             surface = SVGSurface()
         elif fmt == "lbrn2":
             surface = LBRN2Surface()
+        elif fmt == "dxf":
+            surface = DXFSurface()
+        elif fmt == "pdf":
+            surface = PDFSurface()
+        elif fmt == "plt":
+            surface = HPGLSurface()
+        elif fmt == "gcode":
+            surface = GCodeSurface()
         else:
             surface = PSSurface()
 
         ctx = Context(surface)
         return surface, ctx
 
-    def convert(self, data, fmt):
+    def needsConversion(self, fmt):
+        return fmt not in self._BASE_FORMATS
+
+    def isCompressed(self, fmt):
+        return fmt in self._COMPRESSED_FORMATS
 
-        if fmt not in self._BASE_FORMATS:
-            fd, tmpfile = tempfile.mkstemp()
+    def convert(self, data, fmt):
+        """Convert PostScript output to fmt if needed
+
+        :param data: BytesIO or iterable of bytes chunks
+        :param fmt: output format
+
+        The PostScript is piped into the stdin of pstoedit while it is
+        still being generated.
+        """
+        if self.needsConversion(fmt):
+            if isinstance(data, io.BytesIO):
+                data = (data.getvalue(),)
+            fd, outfile = tempfile.mkstemp()
             try:
-                os.write(fd, data.getvalue())
-                os.close(fd)
-                fd2, outfile = tempfile.mkstemp()
+                cmd = self.formats[fmt].format(
+                    pstoedit=self.pstoedit,
+                    input="-",
+                    output=outfile).split()
+                proc = subprocess.Popen(cmd, stdin=subprocess.PIPE)
                 try:
-                    cmd = self.formats[fmt].format(
-                        pstoedit=self.pstoedit,
-                        ps2pdf=self.ps2pdf,
-                        input=tmpfile,
-                        output=outfile).split()
-                    result = subprocess.run(cmd)
-
-                    if result.returncode:
-                        # XXX show stderr output
-                        raise ValueError("Conversion failed. pstoedit returned %i\n\n %s" % (result.returncode, result.stderr))
-                    with open(outfile, 'rb') as ff:
-                        data = io.BytesIO(ff.read())
+                    try:
+                        for chunk in data:
+                            proc.stdin.write(chunk)
+                    except BrokenPipeError:
+                        pass # converter died - return code tells why
+                    finally:
+                        try:
+                            proc.stdin.close()
+                        except BrokenPipeError:
+                            pass
+                    returncode = proc.wait()
                 finally:
-                    os.close(fd2)
-                    os.unlink(outfile)
+                    # generating the input failed - don't leave the converter behind
+                    if proc.poll() is None:
+                        proc.kill()
+                        proc.wait()
+
+                if returncode:
+                    # XXX show stderr output
+                    raise ValueError("Conversion failed. pstoedit returned %i" % returncode)
+                with open(outfile, 'rb') as ff:
+                    data = io.BytesIO(ff.read())
             finally:
-                os.unlink(tmpfile)
+                os.close(fd)
+                os.unlink(outfile)
 
         return data
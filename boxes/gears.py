@@ -258,6 +258,8 @@ class OptionParser(argparse.ArgumentParser):
 
 class Gears():
 
+    _optionParser: OptionParser | None = None
+
     def __init__(self, boxes, **kw) -> None:
         # an alternate way to get debug info:
         # could use inkex.debug(string) instead...
@@ -268,6 +270,10 @@ class Gears():
         #    # print >>self.tty, "gears-dev " + __version__
 
         self.boxes = boxes
+        # The options are the same for all instances
+        if Gears._optionParser is not None:
+            self.OptionParser = Gears._optionParser
+            return
         self.OptionParser = OptionParser()
         self.OptionParser.add_option("-t", "--teeth",
                                      action="store", type="int",
@@ -384,6 +390,7 @@ class Gears():
                                      action="store", type="inkbool",
                                      dest="undercut_alert", default=False,
                                      help="Let the user confirm a warning dialog if undercut occurs. This dialog also shows helpful hints against undercut")
+        Gears._optionParser = self.OptionParser
 
     def calc_circular_pitch(self):
         """We use math based on circular pitch."""
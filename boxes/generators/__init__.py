@@ -49,30 +49,125 @@ ui_groups: list[UIGroup] = [
 ]
 
 
-def getAllBoxGenerators() -> dict[str, type[boxes.Boxes]]:
-    generators = {}
+class GeneratorInfo:
+    """Meta data of a generator that is available without importing it
+
+    Has the attributes of the generator class the user interfaces need
+    to list it. .load() imports the module and returns the class.
+    """
+
+    def __init__(self, module: str, name: str, ui_group: str = "Misc",
+                 webinterface: bool = True, doc: str | None = None) -> None:
+        self.module = module
+        self.__name__ = name
+        self.ui_group = ui_group
+        self.webinterface = webinterface
+        self.__doc__ = doc
+
+    def __repr__(self) -> str:
+        return f"GeneratorInfo({self.module}.{self.__name__})"
+
+    def load(self) -> type[boxes.Boxes]:
+        return getattr(importlib.import_module(self.module), self.__name__)
+
+
+def _generatorPath() -> list[str]:
     path = __path__
-    if "BOXES_GENERATOR_PATH" in os.environ:
-        path.extend(os.environ.get("BOXES_GENERATOR_PATH", "").split(":"))
-    for importer, modname, ispkg in pkgutil.walk_packages(path=path, prefix=__name__ + '.'):
-        module = importlib.import_module(modname)
-        if module.__name__.split('.')[-1].startswith("_"):
+    for p in os.environ.get("BOXES_GENERATOR_PATH", "").split(":"):
+        if p and p not in path:
+            path.append(p)
+    return path
+
+
+def _scanModule(modname: str) -> dict[str, type[boxes.Boxes]]:
+    generators = {}
+    module = importlib.import_module(modname)
+    if module.__name__.split('.')[-1].startswith("_"):
+        return generators
+    for k, v in module.__dict__.items():
+        if v is boxes.Boxes:
             continue
-        for k, v in module.__dict__.items():
-            if v is boxes.Boxes:
-                continue
-            if inspect.isclass(v) and issubclass(v, boxes.Boxes) and v.__name__[0] != '_':
-                generators[modname + '.' + v.__name__] = v
+        if inspect.isclass(v) and issubclass(v, boxes.Boxes) and v.__name__[0] != '_':
+            generators[modname + '.' + v.__name__] = v
+    return generators
+
+
+def scanBoxGenerators() -> dict[str, type[boxes.Boxes]]:
+    """Import all generator modules and return the generators found"""
+    generators = {}
+    for importer, modname, ispkg in pkgutil.walk_packages(path=_generatorPath(), prefix=__name__ + '.'):
+        generators.update(_scanModule(modname))
     return generators
 
 
+def generatorIndexEntries(generators: dict[str, type[boxes.Boxes]]) -> dict[str, tuple]:
+    return {
+        name: (g.__module__, g.__name__, g.ui_group, g.webinterface, g.__doc__)
+        for name, g in generators.items()}
+
+
+def writeGeneratorIndex(filename: str | None = None) -> None:
+    """Regenerate boxes/generators/_index.py
+
+    Needs to be run after adding generators or changing their name,
+    docstring, ui_group or webinterface attribute.
+    """
+    filename = filename or os.path.join(__path__[0], "_index.py")
+    entries = generatorIndexEntries(scanBoxGenerators())
+    with open(filename, "w") as f:
+        f.write('"""Index of the generators - generated by boxes.generators.writeGeneratorIndex()"""\n\n')
+        f.write("GENERATORS = {\n")
+        for name in entries:
+            f.write(f"    {name!r}: {entries[name]!r},\n")
+        f.write("}\n")
+
+
+def getGeneratorIndex() -> dict[str, GeneratorInfo]:
+    """Return infos of all generators without importing them
+
+    Modules not listed in the index - e.g. from BOXES_GENERATOR_PATH -
+    are imported and scanned instead.
+    """
+    try:
+        from boxes.generators._index import GENERATORS
+    except ImportError:
+        GENERATORS = {}
+    by_module: dict[str, dict[str, tuple]] = {}
+    for name, entry in GENERATORS.items():
+        by_module.setdefault(name.rsplit('.', 1)[0], {})[name] = entry
+    index = {}
+    for importer, modname, ispkg in pkgutil.walk_packages(path=_generatorPath(), prefix=__name__ + '.'):
+        if modname in by_module:
+            entries = by_module[modname]
+        elif modname.split('.')[-1].startswith("_"):
+            continue
+        else:
+            entries = generatorIndexEntries(_scanModule(modname))
+        for name, entry in entries.items():
+            index[name] = GeneratorInfo(*entry)
+    return index
+
+
+def getBoxGenerator(name: str) -> type[boxes.Boxes] | None:
+    """Return the generator class by (case insensitive) name
+
+    Only imports the module the generator is defined in.
+    """
+    name = name.lower()
+    for info in getGeneratorIndex().values():
+        if info.__name__.lower() == name:
+            return info.load()
+    return None
+
+
+def getAllBoxGenerators() -> dict[str, type[boxes.Boxes]]:
+    return {name: info.load() for name, info in getGeneratorIndex().items()}
+
+
 def getAllGeneratorModules() -> dict[str, ModuleType]:
     generators = {}
-    path = __path__
-    if "BOXES_GENERATOR_PATH" in os.environ:
-        path.extend(os.environ.get("BOXES_GENERATOR_PATH", "").split(":"))
     for importer, modname, ispkg in pkgutil.walk_packages(
-            path=path,
+            path=_generatorPath(),
             prefix=__name__ + '.',
             onerror=lambda x: None):
         module = importlib.import_module(modname)
@@ -0,0 +1,187 @@
+"""Index of the generators - generated by boxes.generators.writeGeneratorIndex()"""
+
+GENERATORS = {
+    'boxes.generators.abox.ABox': ('boxes.generators.abox', 'ABox', 'Box', True, 'A simple Box'),
+    'boxes.generators.agricolainsert.AgricolaInsert': ('boxes.generators.agricolainsert', 'AgricolaInsert', 'Misc', True, '\n    Agricola Revised Edition game box insert, including some expansions.\n    '),
+    'boxes.generators.airpurifier.AirPurifier': ('boxes.generators.airpurifier', 'AirPurifier', 'Misc', True, 'Housing for the Nukit Open Air Purifier'),
+    'boxes.generators.alledges.AllEdges': ('boxes.generators.alledges', 'AllEdges', 'Misc', True, 'Showing all edge types'),
+    'boxes.generators.angledbox.AngledBox': ('boxes.generators.angledbox', 'AngledBox', 'Box', True, 'Box with both ends cornered'),
+    'boxes.generators.angledcutjig.AngledCutJig': ('boxes.generators.angledcutjig', 'AngledCutJig', 'Misc', True, 'Jig for making angled cuts in a laser cutter'),
+    'boxes.generators.arcade.Arcade': ('boxes.generators.arcade', 'Arcade', 'Misc', True, 'Desktop Arcade Machine'),
+    'boxes.generators.atreus21.Atreus21': ('boxes.generators.atreus21', 'Atreus21', 'Misc', True, 'Generator for a split atreus keyboard.'),
+    'boxes.generators.basedbox.BasedBox': ('boxes.generators.basedbox', 'BasedBox', 'Box', True, 'Fully closed box on a base'),
+    'boxes.generators.bayonetbox.BayonetBox': ('boxes.generators.bayonetbox', 'BayonetBox', 'Box', True, 'Round box made from layers with twist on top'),
+    'boxes.generators.bintray.BinTray': ('boxes.generators.bintray', 'BinTray', 'Shelf', True, 'A Type tray variant to be used up right with sloped walls in front'),
+    'boxes.generators.birdhouse.BirdHouse': ('boxes.generators.birdhouse', 'BirdHouse', 'Misc', True, 'Simple Bird House'),
+    'boxes.generators.bookholder.BookHolder': ('boxes.generators.bookholder', 'BookHolder', 'Misc', True, 'Angled display stand for books, ring files, flyers, postcards, or business cards.'),
+    'boxes.generators.bottlestack.BottleStack': ('boxes.generators.bottlestack', 'BottleStack', 'Misc', True, 'Stack bottles in a fridge'),
+    'boxes.generators.bottletag.BottleTag': ('boxes.generators.bottletag', 'BottleTag', 'Misc', True, 'Paper slip over bottle tag'),
+    'boxes.generators.breadbox.BreadBox': ('boxes.generators.breadbox', 'BreadBox', 'FlexBox', True, 'A BreadBox with a gliding door'),
+    'boxes.generators.brick_sorter.BrickSorter': ('boxes.generators.brick_sorter', 'BrickSorter', 'Box', True, 'Stackable nestable sorting sieve for bricks'),
+    'boxes.generators.burntest.BurnTest': ('boxes.generators.burntest', 'BurnTest', 'Part', True, 'Test different burn values'),
+    'boxes.generators.can_storage.CanStorage': ('boxes.generators.can_storage', 'CanStorage', 'Misc', True, 'Storage box for round containers'),
+    'boxes.generators.carbonfilter.CarbonFilter': ('boxes.generators.carbonfilter', 'CarbonFilter', 'Misc', True, 'Compact filter for activated char coal pellets'),
+    'boxes.generators.cardbox.CardBox': ('boxes.generators.cardbox', 'CardBox', 'Box', True, 'Box for storage of playing cards, with versatile options'),
+    'boxes.generators.cardholder.CardHolder': ('boxes.generators.cardholder', 'CardHolder', 'Shelf', True, 'Shelf for holding (multiple) piles of playing cards / notes'),
+    'boxes.generators.castle.Castle': ('boxes.generators.castle', 'Castle', 'Unstable', True, 'Castle tower with two walls'),
+    'boxes.generators.clock.Clock': ('boxes.generators.clock', 'Clock', 'Misc', True, 'Clock (old style with clock hands)'),
+    'boxes.generators.closedbox.ClosedBox': ('boxes.generators.closedbox', 'ClosedBox', 'Box', True, 'Fully closed box'),
+    'boxes.generators.coffeecapsulesholder.CoffeeCapsuleHolder': ('boxes.generators.coffeecapsulesholder', 'CoffeeCapsuleHolder', 'Misc', True, '\n    Coffee capsule holder\n    '),
+    'boxes.generators.coinbanksafe.CoinBankSafe': ('boxes.generators.coinbanksafe', 'CoinBankSafe', 'Misc', True, 'A piggy-bank designed to look like a safe.'),
+    'boxes.generators.coindisplay.CoinDisplay': ('boxes.generators.coindisplay', 'CoinDisplay', 'Misc', True, 'A showcase for a single coin'),
+    'boxes.generators.compartmentbox.TypeTray': ('boxes.generators.typetray', 'TypeTray', 'Tray', True, 'Type tray - allows only continuous walls'),
+    'boxes.generators.compartmentbox.CompartmentBox': ('boxes.generators.compartmentbox', 'CompartmentBox', 'Tray', True, 'Type tray variation with sliding lid'),
+    'boxes.generators.concaveknob.ConcaveKnob': ('boxes.generators.concaveknob', 'ConcaveKnob', 'Part', True, 'Round knob serrated outside for better gripping'),
+    'boxes.generators.console.Console': ('boxes.generators.console', 'Console', 'Box', True, 'Console with slanted panel'),
+    'boxes.generators.console2.Console2': ('boxes.generators.console2', 'Console2', 'Box', True, 'Console with slanted panel and service hatches'),
+    'boxes.generators.desksign.Desksign': ('boxes.generators.desksign', 'Desksign', 'Misc', True, 'Simple diagonal plate with stands to show name or message.'),
+    'boxes.generators.dicebox.DiceBox': ('boxes.generators.dicebox', 'DiceBox', 'Box', True, 'Box with lid and integrated hinge for storing dice.'),
+    'boxes.generators.dicetower.DiceTower': ('boxes.generators.dicetower', 'DiceTower', 'Misc', True, 'Tool for fairly rolling dice'),
+    'boxes.generators.dinrailbox.DinRailBox': ('boxes.generators.dinrailbox', 'DinRailBox', 'WallMounted', True, 'Box for DIN rail used in electrical junction boxes'),
+    'boxes.generators.discrack.DiscRack': ('boxes.generators.discrack', 'DiscRack', 'Shelf', True, 'A rack for storing disk-shaped objects vertically next to each other'),
+    'boxes.generators.dispenser.Dispenser': ('boxes.generators.dispenser', 'Dispenser', 'Misc', True, 'Dispenser for stackable (flat) items of same size'),
+    'boxes.generators.display.Display': ('boxes.generators.display', 'Display', 'Misc', True, 'Display for flyers or leaflets'),
+    'boxes.generators.displaycase.DisplayCase': ('boxes.generators.displaycase', 'DisplayCase', 'Box', True, 'Fully closed box intended to be cut from transparent acrylics and to serve as a display case.'),
+    'boxes.generators.displayshelf.DisplayShelf': ('boxes.generators.displayshelf', 'DisplayShelf', 'Shelf', True, 'Shelf with slanted floors'),
+    'boxes.generators.dividertray.DividerTray': ('boxes.generators.dividertray', 'DividerTray', 'Tray', True, 'Divider tray - rows and dividers'),
+    'boxes.generators.doubleflexdoorbox.DoubleFlexDoorBox': ('boxes.generators.doubleflexdoorbox', 'DoubleFlexDoorBox', 'FlexBox', True, 'Box with two part lid with living hinges and round corners'),
+    'boxes.generators.drillbox.DrillBox': ('boxes.generators.drillbox', 'DrillBox', 'Tray', True, 'A parametrized box for drills'),
+    'boxes.generators.drillstand.DrillStand': ('boxes.generators.drillstand', 'DrillStand', 'Misc', True, 'Box for drills with each compartment of a different height'),
+    'boxes.generators.edges.Edges': ('boxes.generators.edges', 'Edges', 'Misc', False, 'Print all registered Edge types'),
+    'boxes.generators.electronicsbox.ElectronicsBox': ('boxes.generators.electronicsbox', 'ElectronicsBox', 'Box', True, 'Closed box with screw on top and mounting holes'),
+    'boxes.generators.engravingframe.EngravingFrame': ('boxes.generators.engravingframe', 'EngravingFrame', 'Box', True, 'A frame for an engraving ; can be either standing or hanging, both in portrait or landscape'),
+    'boxes.generators.eurorackskiff.EuroRackSkiff': ('boxes.generators.eurorackskiff', 'EuroRackSkiff', 'Box', True, '3U Height case with adjustable width and height and included rails'),
+    'boxes.generators.fanhole.FanHole': ('boxes.generators.fanhole', 'FanHole', 'Holes', True, 'Hole pattern for mounting a fan'),
+    'boxes.generators.fatballdispenser.FatBallDispenser': ('boxes.generators.fatballdispenser', 'FatBallDispenser', 'Misc', True, 'Birdhouse for fat balls.'),
+    'boxes.generators.filamentspool.BayonetBox': ('boxes.generators.bayonetbox', 'BayonetBox', 'Box', True, 'Round box made from layers with twist on top'),
+    'boxes.generators.filamentspool.FilamentSpool': ('boxes.generators.filamentspool', 'FilamentSpool', 'Misc', True, 'A two part spool for 3D printing filament'),
+    'boxes.generators.filltest.FillTest': ('boxes.generators.filltest', 'FillTest', 'Part', True, 'Piece for testing different settings for hole filling'),
+    'boxes.generators.flexbook.FlexBook': ('boxes.generators.flexbook', 'FlexBook', 'FlexBox', True, 'Box with living hinge styled after a book.'),
+    'boxes.generators.flexbox.FlexBox': ('boxes.generators.flexbox', 'FlexBox', 'FlexBox', True, 'Box with living hinge and round corners'),
+    'boxes.generators.flexbox2.FlexBox2': ('boxes.generators.flexbox2', 'FlexBox2', 'FlexBox', True, 'Box with living hinge and top corners rounded'),
+    'boxes.generators.flexbox3.FlexBox3': ('boxes.generators.flexbox3', 'FlexBox3', 'FlexBox', True, 'Box with living hinge'),
+    'boxes.generators.flexbox4.FlexBox4': ('boxes.generators.flexbox4', 'FlexBox4', 'FlexBox', True, 'Box with living hinge and left corners rounded'),
+    'boxes.generators.flexbox5.FlexBox5': ('boxes.generators.flexbox5', 'FlexBox5', 'FlexBox', True, 'Box with living hinge and round corners'),
+    'boxes.generators.flextest.FlexTest': ('boxes.generators.flextest', 'FlexTest', 'Part', True, 'Piece for testing different flex settings'),
+    'boxes.generators.flextest2.FlexTest2': ('boxes.generators.flextest2', 'FlexTest2', 'Part', True, 'Piece for testing 2D flex settings'),
+    'boxes.generators.folder.Folder': ('boxes.generators.folder', 'Folder', 'Misc', True, 'Book cover with flex for the spine'),
+    'boxes.generators.frontpanel.FrontPanel': ('boxes.generators.frontpanel', 'FrontPanel', 'Holes', True, 'Mounting Holes and cutouts for all your holy needs.'),
+    'boxes.generators.gear.Gears': ('boxes.generators.gear', 'Gears', 'Part', True, 'Gears'),
+    'boxes.generators.gearbox.GearBox': ('boxes.generators.gearbox', 'GearBox', 'Part', True, 'Gearbox with multiple identical stages'),
+    'boxes.generators.gridfinitybase.GridfinityBase': ('boxes.generators.gridfinitybase', 'GridfinityBase', 'Tray', True, 'A parameterized Gridfinity base'),
+    'boxes.generators.gridfinitydrillbox.GridfinityTrayLayout': ('boxes.generators.gridfinitytraylayout', 'GridfinityTrayLayout', 'Tray', True, 'A Gridfinity Tray Generator based on TrayLayout'),
+    'boxes.generators.gridfinitydrillbox.GridfinityDrillBox': ('boxes.generators.gridfinitydrillbox', 'GridfinityDrillBox', 'Tray', True, 'A Gridfinity box for drills or similar tools'),
+    'boxes.generators.gridfinitytraylayout.TrayLayout': ('boxes.generators.traylayout', 'TrayLayout', 'Tray', True, 'Generate a typetray from a layout file.'),
+    'boxes.generators.gridfinitytraylayout.GridfinityTrayLayout': ('boxes.generators.gridfinitytraylayout', 'GridfinityTrayLayout', 'Tray', True, 'A Gridfinity Tray Generator based on TrayLayout'),
+    'boxes.generators.halfbox.HalfBox': ('boxes.generators.halfbox', 'HalfBox', 'Box', True, 'Configurable half of a box which can be: a bookend, a hanging shelf, an angle clamping jig, ...'),
+    'boxes.generators.heart.HeartBox': ('boxes.generators.heart', 'HeartBox', 'FlexBox', True, 'Box in the form of a heart'),
+    'boxes.generators.hingebox.HingeBox': ('boxes.generators.hingebox', 'HingeBox', 'Box', True, 'Box with lid attached by cabinet hinges'),
+    'boxes.generators.hobbycase.HobbyCase': ('boxes.generators.hobbycase', 'HobbyCase', 'Tray', True, 'A case that can be used in any hobby involving small pieces in need of organizing.'),
+    'boxes.generators.holepattern.HolePattern': ('boxes.generators.holepattern', 'HolePattern', 'Holes', True, 'Generate hole patterns in different simple shapes'),
+    'boxes.generators.hooks.Hook': ('boxes.generators.hooks', 'Hook', 'Misc', True, 'A hook with a rectangular mouth to mount at the wall'),
+    'boxes.generators.integratedhingebox.IntegratedHingeBox': ('boxes.generators.integratedhingebox', 'IntegratedHingeBox', 'Box', True, 'Box with lid and integrated hinge.'),
+    'boxes.generators.jigsaw.JigsawPuzzle': ('boxes.generators.jigsaw', 'JigsawPuzzle', 'Misc', False, 'Fractal jigsaw puzzle. Still alpha.'),
+    'boxes.generators.jointpanel.JointPanel': ('boxes.generators.jointpanel', 'JointPanel', 'Misc', True, 'Create pieces larger than your laser cutter by joining them with Dove Tails'),
+    'boxes.generators.kamishibai.Kamishibai': ('boxes.generators.kamishibai', 'Kamishibai', 'Misc', True, 'Kamishibai butai (japanese image theatre)'),
+    'boxes.generators.keyholder.KeyHolder': ('boxes.generators.keyholder', 'KeyHolder', 'WallMounted', True, 'Wall organizer with hooks for keys or similar small items'),
+    'boxes.generators.keypad.Keypad': ('boxes.generators.keypad', 'Keypad', 'Box', True, 'Generator for keypads with mechanical switches.'),
+    'boxes.generators.lamp.Lamp': ('boxes.generators.lamp', 'Lamp', 'Misc', False, None),
+    'boxes.generators.laptopstand.LaptopStand': ('boxes.generators.laptopstand', 'LaptopStand', 'Misc', True, 'A simple X shaped frame to support a laptop on a given angle'),
+    'boxes.generators.laserclamp.LaserClamp': ('boxes.generators.laserclamp', 'LaserClamp', 'Misc', True, 'A clamp to hold down material to a knife table'),
+    'boxes.generators.laserholdfast.LaserHoldfast': ('boxes.generators.laserholdfast', 'LaserHoldfast', 'Part', True, 'A holdfast for honey comb tables of laser cutters'),
+    'boxes.generators.lbeam.LBeam': ('boxes.generators.lbeam', 'LBeam', 'Part', True, 'Simple L-Beam: two pieces joined with a right angle'),
+    'boxes.generators.magazinefile.MagazineFile': ('boxes.generators.magazinefile', 'MagazineFile', 'Misc', True, 'Open magazine file'),
+    'boxes.generators.makitapowersupply.MakitaPowerSupply': ('boxes.generators.makitapowersupply', 'MakitaPowerSupply', 'Misc', True, 'Bench power supply powered with Maktia 18V battery or laptop power supply'),
+    'boxes.generators.matrix.Matrix': ('boxes.generators.matrix', 'Matrix', 'Misc', True, 'WS2812b matrix enclosure'),
+    'boxes.generators.microrack.SBCMicroRack': ('boxes.generators.microrack', 'SBCMicroRack', 'Shelf', True, 'Stackable rackable racks for SBC Pi-Style Computers'),
+    'boxes.generators.nemamount.NemaMount': ('boxes.generators.nemamount', 'NemaMount', 'Part', True, 'Mounting bracket for a Nema motor'),
+    'boxes.generators.nemapattern.NemaPattern': ('boxes.generators.nemapattern', 'NemaPattern', 'Holes', True, 'Mounting holes for a Nema motor'),
+    'boxes.generators.nightlightbox.NightLightBox': ('boxes.generators.nightlightbox', 'NightLightBox', 'Misc', True, 'Simple decorative lamp with creatively laser cut plates'),
+    'boxes.generators.notesholder.NotesHolder': ('boxes.generators.notesholder', 'NotesHolder', 'Box', True, 'Box for holding a stack of paper, coasters etc'),
+    'boxes.generators.openbox.OpenBox': ('boxes.generators.openbox', 'OpenBox', 'Box', True, 'Box with top and front open'),
+    'boxes.generators.organpipe.OrganPipe': ('boxes.generators.organpipe', 'OrganPipe', 'Unstable', True, 'Rectangular organ pipe based on pipecalc'),
+    'boxes.generators.ottobody.OttoBody': ('boxes.generators.ottobody', 'OttoBody', 'Misc', True, 'Otto LC - a laser cut chassis for Otto DIY - body'),
+    'boxes.generators.ottolegs.OttoLegs': ('boxes.generators.ottolegs', 'OttoLegs', 'Misc', True, 'Otto LC - a laser cut chassis for Otto DIY - legs'),
+    'boxes.generators.ottosoles.OttoSoles': ('boxes.generators.ottosoles', 'OttoSoles', 'Misc', True, 'Foam soles for the OttO bot'),
+    'boxes.generators.paintbox.PaintStorage': ('boxes.generators.paintbox', 'PaintStorage', 'Shelf', True, 'Stackable storage for hobby paint or other things'),
+    'boxes.generators.paperbox.PaperBox': ('boxes.generators.paperbox', 'PaperBox', 'Misc', True, '\n    Box made of paper, with lid.\n    '),
+    'boxes.generators.phoneholder.PhoneHolder': ('boxes.generators.phoneholder', 'PhoneHolder', 'Misc', True, '\n    Smartphone desk holder\n    '),
+    'boxes.generators.photoframe.PhotoFrame': ('boxes.generators.photoframe', 'PhotoFrame', 'Misc', True, '\n    3-layer photo frame with a slot at the top to slide matboard/acrylic/glass over the photo after glue-up.\n    '),
+    'boxes.generators.piratechest.PirateChest': ('boxes.generators.piratechest', 'PirateChest', 'Box', True, 'Box with polygon lid with chest hinges.'),
+    'boxes.generators.pizzashovel.PizzaShovel': ('boxes.generators.pizzashovel', 'PizzaShovel', 'Misc', True, 'Pizza shovel with conveyor belt action'),
+    'boxes.generators.planetary.Planetary': ('boxes.generators.planetary', 'Planetary', 'Part', True, 'Planetary Gear with possibly multiple identical stages'),
+    'boxes.generators.planetary2.Planetary2': ('boxes.generators.planetary2', 'Planetary2', 'Unstable', True, 'Balanced force Difference Planetary Gear (not yet working properly)'),
+    'boxes.generators.platonic.Platonic': ('boxes.generators.platonic', 'Platonic', 'Unstable', True, 'Platonic solids generator'),
+    'boxes.generators.polehook.PoleHook': ('boxes.generators.polehook', 'PoleHook', 'Misc', True, 'Hook for pole like things to be clamped to another pole'),
+    'boxes.generators.pulley.Pulley': ('boxes.generators.pulley', 'Pulley', 'Part', True, 'Timing belt pulleys for different profiles'),
+    'boxes.generators.rack10box.Rack19Box': ('boxes.generators.rack19box', 'Rack19Box', 'Box', True, 'Closed box with screw on top for mounting in a 19" rack.'),
+    'boxes.generators.rack10box.Rack10Box': ('boxes.generators.rack10box', 'Rack10Box', 'Box', True, 'Closed box with screw on top for mounting in a 10" rack.'),
+    'boxes.generators.rack19box.Rack19Box': ('boxes.generators.rack19box', 'Rack19Box', 'Box', True, 'Closed box with screw on top for mounting in a 19" rack.'),
+    'boxes.generators.rack19halfwidth.Rack19HalfWidth': ('boxes.generators.rack19halfwidth', 'Rack19HalfWidth', 'Box', True, 'Half width 19inch rack unit for musical equipment.'),
+    'boxes.generators.rackbox.RackBox': ('boxes.generators.rackbox', 'RackBox', 'Box', True, 'Closed box with screw on top and mounting holes'),
+    'boxes.generators.rectangularWall.RectangularWall': ('boxes.generators.rectangularWall', 'RectangularWall', 'Part', True, 'Simple wall with options for different edges'),
+    'boxes.generators.regularbox.BayonetBox': ('boxes.generators.bayonetbox', 'BayonetBox', 'Box', True, 'Round box made from layers with twist on top'),
+    'boxes.generators.regularbox.RegularBox': ('boxes.generators.regularbox', 'RegularBox', 'Box', True, 'Box with regular polygon as base'),
+    'boxes.generators.regularstarbox.RegularStarBox': ('boxes.generators.regularstarbox', 'RegularStarBox', 'Box', True, 'Regular polygon boxes that form a star when closed'),
+    'boxes.generators.robotarm.RobotArm': ('boxes.generators.robotarm', 'RobotArm', 'Part', True, 'Segments of servo powered robot arm'),
+    'boxes.generators.rollholder.RollHolder': ('boxes.generators.rollholder', 'RollHolder', 'WallMounted', True, 'Holder for kitchen rolls or other rolls'),
+    'boxes.generators.rotary.Rotary': ('boxes.generators.rotary', 'Rotary', 'Unstable', True, 'Rotary Attachment for engraving cylindrical objects in a laser cutter'),
+    'boxes.generators.roundedbox.RoundedBox': ('boxes.generators.roundedbox', 'RoundedBox', 'FlexBox', True, 'Box with vertical edges rounded'),
+    'boxes.generators.roundedregularbox.RoundedRegularBox': ('boxes.generators.roundedregularbox', 'RoundedRegularBox', 'FlexBox', True, 'Regular polygon box with rounded vertical edges.'),
+    'boxes.generators.royalgame.RoyalGame': ('boxes.generators.royalgame', 'RoyalGame', 'Misc', True, 'The Royal Game of Ur'),
+    'boxes.generators.sevensegment.SevenSegmentPattern': ('boxes.generators.sevensegment', 'SevenSegmentPattern', 'Holes', True, 'Holepatterns and walls for a seven segment digit'),
+    'boxes.generators.sevensegmentclock.SevenSegmentPattern': ('boxes.generators.sevensegment', 'SevenSegmentPattern', 'Holes', True, 'Holepatterns and walls for a seven segment digit'),
+    'boxes.generators.sevensegmentclock.SevenSegmentClock': ('boxes.generators.sevensegmentclock', 'SevenSegmentClock', 'Unstable', True, 'Seven segment clock build with LED stripe'),
+    'boxes.generators.shadowbox.Shadowbox': ('boxes.generators.shadowbox', 'Shadowbox', 'Misc', True, 'The frame and spacers necessary to display a shadowbox / lightbox.'),
+    'boxes.generators.shoe.Shoe': ('boxes.generators.shoe', 'Shoe', 'Misc', True, 'Shoe shaped box'),
+    'boxes.generators.shutterbox.ShutterBox': ('boxes.generators.shutterbox', 'ShutterBox', 'FlexBox', True, 'Box with a rolling shutter made of flex'),
+    'boxes.generators.sidedoorhousing.Console2': ('boxes.generators.console2', 'Console2', 'Box', True, 'Console with slanted panel and service hatches'),
+    'boxes.generators.sidedoorhousing.SideDoorHousing': ('boxes.generators.sidedoorhousing', 'SideDoorHousing', 'Box', True, 'Box with service hatches on either one or both of the sides that are locked with latches'),
+    'boxes.generators.sidehingebox.SideHingeBox': ('boxes.generators.sidehingebox', 'SideHingeBox', 'Box', True, 'Box, with an hinge that does not protrude from the back of the box, and a latch.'),
+    'boxes.generators.silverwarebox.Silverware': ('boxes.generators.silverwarebox', 'Silverware', 'Unstable', True, '\n    Cuttlery stand with carrying grip\n    using flex for rounded corners\n    '),
+    'boxes.generators.skadis.SkadisBoard': ('boxes.generators.skadis', 'SkadisBoard', 'WallMounted', True, 'Customizable Ikea like pegboard'),
+    'boxes.generators.slantedtray.SlantedTray': ('boxes.generators.slantedtray', 'SlantedTray', 'Tray', True, 'One row tray with high back wall and low front wall'),
+    'boxes.generators.slidingdrawer.SlidingDrawer': ('boxes.generators.slidingdrawer', 'SlidingDrawer', 'Box', True, 'Sliding drawer box'),
+    'boxes.generators.slidinglidbox.SlidingLidBox': ('boxes.generators.slidinglidbox', 'SlidingLidBox', 'Box', True, 'Box with rails for a sliding lid'),
+    'boxes.generators.smallpartstray.SmallPartsTray': ('boxes.generators.smallpartstray', 'SmallPartsTray', 'Tray', True, 'Tray with slants to easier get out game tokens or screws'),
+    'boxes.generators.smallpartstray2.SmallPartsTray2': ('boxes.generators.smallpartstray2', 'SmallPartsTray2', 'Tray', True, 'A Type Tray variant with slopes toward the front'),
+    'boxes.generators.sphere.Sphere': ('boxes.generators.sphere', 'Sphere', 'Misc', True, 'Actually not a sphere, but a hosohedron. Also not actually a box, but a globe, lamp, ornament or whatever you want it to be.'),
+    'boxes.generators.spicesrack.SpicesRack': ('boxes.generators.spicesrack', 'SpicesRack', 'Shelf', True, 'Rack for cans of spices'),
+    'boxes.generators.spool.Spool': ('boxes.generators.spool', 'Spool', 'Misc', True, 'A simple spool'),
+    'boxes.generators.stachel.Stachel': ('boxes.generators.stachel', 'Stachel', 'Misc', True, 'Bass Recorder Endpin'),
+    'boxes.generators.stackablebin.StackableBin': ('boxes.generators.stackablebin', 'StackableBin', 'Shelf', True, 'Stackable bin base on bintray'),
+    'boxes.generators.storagerack.StorageRack': ('boxes.generators.storagerack', 'StorageRack', 'Shelf', True, 'StorageRack to store boxes and trays which have their own floor'),
+    'boxes.generators.storageshelf.StorageShelf': ('boxes.generators.storageshelf', 'StorageShelf', 'Shelf', True, 'StorageShelf can be used to store Typetray'),
+    'boxes.generators.tetris.Tetris': ('boxes.generators.tetris', 'Tetris', 'Misc', True, '3D Tetris shapes'),
+    'boxes.generators.trafficlight.TrafficLight': ('boxes.generators.trafficlight', 'TrafficLight', 'Misc', True, 'Traffic light'),
+    'boxes.generators.trayinsert.TrayInsert': ('boxes.generators.trayinsert', 'TrayInsert', 'Tray', True, 'Tray insert without floor and outer walls - allows only continuous walls'),
+    'boxes.generators.traylayout.TrayLayoutFile': ('boxes.generators.traylayout', 'TrayLayoutFile', 'Tray', False, 'Generate a layout file for a typetray.'),
+    'boxes.generators.traylayout.TrayLayout': ('boxes.generators.traylayout', 'TrayLayout', 'Tray', True, 'Generate a typetray from a layout file.'),
+    'boxes.generators.trianglelamp.TriangleLamp': ('boxes.generators.trianglelamp', 'TriangleLamp', 'Misc', True, 'Triangle LED Lamp'),
+    'boxes.generators.triangularwall.TriangularWall': ('boxes.generators.triangularwall', 'TriangularWall', 'Part', True, 'Simple wall with options for different edges'),
+    'boxes.generators.two_piece.TwoPiece': ('boxes.generators.two_piece', 'TwoPiece', 'Box', True, 'A two piece box where top slips over the bottom half to form the enclosure.'),
+    'boxes.generators.typetray.TypeTray': ('boxes.generators.typetray', 'TypeTray', 'Tray', True, 'Type tray - allows only continuous walls'),
+    'boxes.generators.ubox.UBox': ('boxes.generators.ubox', 'UBox', 'FlexBox', True, 'Box various options for different stypes and lids'),
+    'boxes.generators.unevenheightbox.UnevenHeightBox': ('boxes.generators.unevenheightbox', 'UnevenHeightBox', 'Box', True, 'Box with different height in each corner'),
+    'boxes.generators.universalbox.UniversalBox': ('boxes.generators.universalbox', 'UniversalBox', 'Box', True, 'Box with various options for different styles and lids'),
+    'boxes.generators.wallcaliperholder.WallCaliper': ('boxes.generators.wallcaliperholder', 'WallCaliper', 'WallMounted', True, 'Holds a single caliper to a wall'),
+    'boxes.generators.wallchiselholder.WallChiselHolder': ('boxes.generators.wallchiselholder', 'WallChiselHolder', 'WallMounted', True, 'Wall tool holder for chisels, files and similar tools'),
+    'boxes.generators.wallconsole.WallConsole': ('boxes.generators.wallconsole', 'WallConsole', 'WallMounted', True, 'Outset and angled plate to mount stuff to'),
+    'boxes.generators.walldrillbox.DrillStand': ('boxes.generators.drillstand', 'DrillStand', 'Misc', True, 'Box for drills with each compartment of a different height'),
+    'boxes.generators.walldrillbox.WallDrillBox': ('boxes.generators.walldrillbox', 'WallDrillBox', 'WallMounted', True, 'Box for drills with each compartment with a different height'),
+    'boxes.generators.walledges.WallEdges': ('boxes.generators.walledges', 'WallEdges', 'WallMounted', True, 'Shows the different edge types for wall systems'),
+    'boxes.generators.wallhopper.WallHopper': ('boxes.generators.wallhopper', 'WallHopper', 'WallMounted', True, 'Storage hopper with dispensing tray'),
+    'boxes.generators.wallpinrow.WallPinRow': ('boxes.generators.wallpinrow', 'WallPinRow', 'WallMounted', True, 'Outset and angled plate to mount stuff to'),
+    'boxes.generators.wallplaneholder.WallPlaneHolder': ('boxes.generators.wallplaneholder', 'WallPlaneHolder', 'WallMounted', True, 'Hold a plane to a wall'),
+    'boxes.generators.wallpliersholder.WallPliersHolder': ('boxes.generators.wallpliersholder', 'WallPliersHolder', 'WallMounted', True, 'Bar to hang pliers on'),
+    'boxes.generators.wallrack.WallRack': ('boxes.generators.wallrack', 'WallRack', 'WallMounted', True, 'Wall mountable rack for spices or other items'),
+    'boxes.generators.wallrollholder.WallRollHolder': ('boxes.generators.wallrollholder', 'WallRollHolder', 'WallMounted', True, 'Holder for kitchen rolls or other rolls'),
+    'boxes.generators.wallslottedholder.WallSlottedHolder': ('boxes.generators.wallslottedholder', 'WallSlottedHolder', 'WallMounted', True, 'Wall tool holder with slots'),
+    'boxes.generators.wallstackablebin.WallStackableBin': ('boxes.generators.wallstackablebin', 'WallStackableBin', 'WallMounted', True, 'A wall-mounted bin that can stack or hang from a wall.'),
+    'boxes.generators.wallstairs.WallStairs': ('boxes.generators.wallstairs', 'WallStairs', 'WallMounted', True, 'Platforms in different heights e.g. for screw drivers'),
+    'boxes.generators.walltypetray.WallTypeTray': ('boxes.generators.walltypetray', 'WallTypeTray', 'WallMounted', True, 'Type tray - allows only continuous walls'),
+    'boxes.generators.wallwrenchholder.WallWrenchHolder': ('boxes.generators.wallwrenchholder', 'WallWrenchHolder', 'WallMounted', True, 'Hold a set of wrenches at a wall'),
+    'boxes.generators.wavyknob.WavyKnob': ('boxes.generators.wavyknob', 'WavyKnob', 'Part', True, 'Round knob serrated outside for better gripping'),
+    'boxes.generators.winerack.WineRack': ('boxes.generators.winerack', 'WineRack', 'Shelf', True, 'Honey Comb Style Wine Rack'),
+    'boxes.generators.zbeam.ZBeam': ('boxes.generators.zbeam', 'ZBeam', 'Part', True, 'Z-Beam (or U-Beam): three pieces joined at right angles'),
+}
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""Benchmark the generators
+
+Times the phases of rendering each generator in each output format
+and records the number of segments, the size of the result and the
+peak memory used. The results are written as JSON and can be
+compared against an earlier run to find regressions:
+
+  boxes_bench --output baseline.json
+  ... change the code ...
+  boxes_bench --baseline baseline.json --output new.json
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import sys
+import tracemalloc
+
+try:
+    import boxes
+except ImportError:
+    sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../..'))
+    import boxes
+
+import boxes.generators
+from boxes.scripts.boxes_main import EXAMPLE_SKIP, generators_by_name
+
+# See Boxes.timings - convert writes the output format including
+# Formats.convert if needed
+PHASES = ("parseArgs", "open", "render", "close", "convert")
+
+
+def render_phases(name: str, fmt: str) -> tuple[dict[str, float], dict[str, int]]:
+    """Render a generator with its default arguments once
+
+    Returns the seconds per phase and the counters of the drawing
+    including the size of the result in bytes.
+    """
+    box = boxes.generators.getBoxGenerator(name)()
+    box.parseArgs([f"--format={fmt}"])
+    box.metadata["reproducible"] = True
+    box.open()
+    box.render()
+    size = sum(len(chunk) for chunk in box.close(stream=True))
+    return box.timings, {**box.counters, "size": size}
+
+
+def bench(name: str, fmt: str, repeat: int = 3, memory: bool = True) -> dict:
+    """Benchmark a generator in one format
+
+    Phase times are the minimum over repeat runs. The peak memory is
+    measured in an extra run as tracing slows down rendering. Errors
+    are returned in the result instead of raised.
+    """
+    result: dict = {}
+    err = io.StringIO()
+    try:
+        # some generators print warnings, argparse reports errors on stderr
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(err):
+            runs = [render_phases(name, fmt) for _ in range(repeat)]
+            if memory:
+                tracemalloc.start()
+                try:
+                    render_phases(name, fmt)
+                    result["peak_memory"] = tracemalloc.get_traced_memory()[1]
+                finally:
+                    tracemalloc.stop()
+    except (Exception, SystemExit) as e:
+        messages = err.getvalue().strip().splitlines()
+        return {"error": messages[-1] if messages else f"{type(e).__name__}: {e}"}
+    for phase in PHASES:
+        result[phase] = min(times[phase] for times, _ in runs)
+    result["total"] = min(sum(times.values()) for times, _ in runs)
+    result.update(runs[0][1])
+    return result
+
+
+def compare(results: dict, baseline: dict, threshold: float = 0.1,
+            min_seconds: float = 0.001) -> list[tuple[str, str, float, float]]:
+    """Find the benchmarks that got slower or use more memory
+
+    A value regressed if it grew by more than threshold (relative) and
+    for times also by more than min_seconds to ignore noise of very
+    short runs. Returns (benchmark, metric, old, new) tuples.
+    """
+    regressions = []
+    for key, new in results.items():
+        old = baseline.get(key)
+        if not old or "error" in old or "error" in new:
+            continue
+        for metric in ("total", "peak_memory"):
+            if metric not in old or metric not in new:
+                continue
+            if new[metric] <= old[metric] * (1 + threshold):
+                continue
+            if metric == "total" and new[metric] - old[metric] < min_seconds:
+                continue
+            regressions.append((key, metric, old[metric], new[metric]))
+    return regressions
+
+
+def format_change(new: float, old: float | None) -> str:
+    if not old:
+        return ""
+    return f"{(new - old) / old:+.0%}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(formatter_class=argparse.RawDescriptionHelpFormatter, description=__doc__)
+    parser.allow_abbrev = False
+    parser.add_argument("--generators", type=str, default="", help="Comma separated generators to run. Default: all")
+    parser.add_argument("--formats", type=str, default="", help="Comma separated output formats. Default: all")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of runs per benchmark. The fastest counts.")
+    parser.add_argument("--no_memory", action="store_true", default=False, help="Do not measure the peak memory.")
+    parser.add_argument("--output", type=str, default=None, help="File to write the results to as JSON.")
+    parser.add_argument("--baseline", type=str, default=None, help="JSON file of an earlier run to compare to.")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative increase of time or memory that counts as regression. Default: 0.1 (10%%)")
+    args = parser.parse_args()
+
+    if args.generators:
+        names = []
+        for name in args.generators.split(","):
+            generator = boxes.generators.getBoxGenerator(name.strip())
+            if generator is None:
+                parser.error(f"Unknown generator '{name}'")
+            names.append(generator.__name__)
+    else:
+        names = sorted(info.__name__ for info in generators_by_name().values())
+        names = [name for name in names if name not in EXAMPLE_SKIP]
+    all_formats = boxes.formats.Formats().getFormats()
+    formats = args.formats.split(",") if args.formats else all_formats
+    for fmt in formats:
+        if fmt not in all_formats:
+            parser.error(f"Unknown format '{fmt}'. Use one of {', '.join(all_formats)}")
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+
+    results = {}
+    errors = 0
+    for name in names:
+        for fmt in formats:
+            key = f"{name}/{fmt}"
+            result = results[key] = bench(name, fmt, args.repeat, not args.no_memory)
+            if "error" in result:
+                errors += 1
+                print(f"{key:<35} ERROR {result['error']}")
+                continue
+            old = baseline.get(key, {})
+            line = f"{key:<35} {result['total'] * 1000:9.1f}ms {format_change(result['total'], old.get('total')):>6}"
+            line += f" {result['segments']:8d} segments"
+            if "peak_memory" in result:
+                line += f" {result['peak_memory'] / 2**20:7.1f}MiB {format_change(result['peak_memory'], old.get('peak_memory')):>6}"
+            print(line, flush=True)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "created": datetime.datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "repeat": args.repeat,
+                "results": results,
+            }, f, indent=1)
+
+    regressions = compare(results, baseline, args.threshold)
+    for key, metric, old, new in regressions:
+        print(f"REGRESSION: {key} {metric} {old:.4g} -> {new:.4g} ({format_change(new, old)})")
+    if errors:
+        print(f"{errors} benchmarks failed")
+    if regressions or errors:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
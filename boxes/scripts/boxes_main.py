@@ -6,10 +6,20 @@ Generate stencils for wooden boxes.
 """
 from __future__ import annotations
 
+import contextlib
 import gettext
+import decimal
+import io
+import itertools
+import json
+import math
+import multiprocessing
 import os
 import sys
 import argparse
+import time
+import traceback
+from functools import partial
 from pathlib import Path
 
 try:
@@ -40,29 +50,114 @@ def print_grouped_generators() -> None:
             print(f' *  {box.__name__:<15} - {ConsoleColors.ITALIC}{description}{ConsoleColors.CLEAR}')
 
 
-def create_example_every_generator() -> None:
-    print("Generating SVG examples for every possible generator.")
-    for group in generator_groups():
-        for boxExample in group.generators:
-            boxName = boxExample.__name__
-            notTestGenerator = ('GridfinityTrayLayout', 'TrayLayout', 'TrayLayoutFile', 'TypeTray', 'Edges',)
-            brokenGenerator = ()
-            avoidGenerator = notTestGenerator + brokenGenerator
-            if boxName in avoidGenerator:
-                print(f"SKIP: {boxName}")
-                continue
-            print(f"Generate example for: {boxName}")
+# Generators without a meaningful result for the default arguments
+EXAMPLE_SKIP = ('GridfinityTrayLayout', 'TrayLayout', 'TrayLayoutFile', 'TypeTray', 'Edges',)
 
-            box = boxExample()
-            box.translations = get_translation()
+
+class ExampleResult:
+    """Outcome of rendering the example of one generator
+
+    data is None and error contains the traceback if rendering failed.
+    out and err hold what was written to stdout and stderr.
+    """
+
+    def __init__(self, name: str, data: bytes | None, error: str | None,
+                 seconds: float, out: str = "", err: str = "") -> None:
+        self.name = name
+        self.data = data
+        self.error = error
+        self.seconds = seconds
+        self.out = out
+        self.err = err
+
+
+def render_example(name: str, translate: bool = False) -> ExampleResult:
+    """Render a generator with its default arguments
+
+    Errors are returned instead of raised so a broken generator does not
+    affect the others.
+    """
+    start = time.perf_counter()
+    out, err = io.StringIO(), io.StringIO()
+    data, error = None, None
+    try:
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+            generator = boxes.generators.getBoxGenerator(name)
+            if generator is None:
+                raise ValueError(f"Unknown generator '{name}'")
+            box = generator()
+            if translate:
+                box.translations = get_translation()
             box.parseArgs("")
             box.metadata["reproducible"] = True
             box.open()
             box.render()
-            boxData = box.close()
+            data = box.close().getvalue()
+    except Exception:
+        error = traceback.format_exc()
+    return ExampleResult(name, data, error, time.perf_counter() - start,
+                         out.getvalue(), err.getvalue())
+
+
+def parallel_map(func, items, jobs: int = 1, ordered: bool = True):
+    """Like map() but uses jobs processes (0 for one per CPU)
+
+    If not ordered the results are yielded as they get finished.
+    """
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+    if jobs == 1:
+        yield from map(func, items)
+        return
+    with multiprocessing.Pool(jobs) as pool:
+        if ordered:
+            yield from pool.imap(func, items)
+        else:
+            yield from pool.imap_unordered(func, items)
+
+
+def render_examples(names, jobs: int = 1, translate: bool = False):
+    """Render the examples of the generators in names
+
+    Uses jobs processes in parallel (0 for one per CPU). Yields the
+    ExampleResults in the order they get finished.
+    """
+    render = partial(render_example, translate=translate)
+    yield from parallel_map(render, names, jobs, ordered=False)
 
-            file = Path('examples') / (boxName + '.svg')
-            file.write_bytes(boxData.getvalue())
+
+def create_example_every_generator(jobs: int = 1) -> list[str]:
+    """Write the examples into the "examples" folder
+
+    Returns the names of the generators that failed.
+    """
+    print("Generating SVG examples for every possible generator.")
+    names = []
+    for group in generator_groups():
+        for boxExample in group.generators:
+            boxName = boxExample.__name__
+            if boxName in EXAMPLE_SKIP:
+                print(f"SKIP: {boxName}")
+                continue
+            names.append(boxName)
+
+    failed = []
+    start = time.perf_counter()
+    for result in render_examples(names, jobs, translate=True):
+        sys.stdout.write(result.out)
+        sys.stderr.write(result.err)
+        if result.error is not None:
+            print(f"FAILED: {result.name} ({result.seconds:.2f}s)")
+            sys.stderr.write(result.error)
+            failed.append(result.name)
+            continue
+        print(f"Generate example for: {result.name} ({result.seconds:.2f}s)")
+        file = Path('examples') / (result.name + '.svg')
+        file.write_bytes(result.data)
+    print(f"{len(names) - len(failed)} examples generated in {time.perf_counter() - start:.1f}s.")
+    if failed:
+        print("Failed: " + ", ".join(sorted(failed)))
+    return failed
 
 
 def get_translation():
@@ -72,24 +167,295 @@ def get_translation():
         return gettext.translation('boxes.py', fallback=True)
 
 
-def run_generator(name: str, args) -> None:
-    generators = generators_by_name()
-    lower_name = name.lower()
+@contextlib.contextmanager
+def profiled(enabled: bool = True, output: str | None = None):
+    """Run the block with cProfile and print the slowest functions
+
+    If output is given the full statistics are also saved there - e.g.
+    for snakeviz.
+    """
+    if not enabled:
+        yield
+        return
+    import cProfile
+    import pstats
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(25)
+        if output:
+            profiler.dump_stats(output)
+
+
+def print_timings(box) -> None:
+    """Print the time per phase and the size of the drawing to stderr"""
+    for phase, seconds in box.timings.items():
+        sys.stderr.write(f"{phase:<10} {seconds * 1000:9.1f}ms\n")
+    sys.stderr.write(", ".join(f"{count} {name}" for name, count in box.counters.items()) + "\n")
+
 
-    if lower_name in generators.keys():
-        box = generators[lower_name]()
+def run_generator(name: str, args, profile: bool = False, profile_output: str | None = None) -> None:
+    generator = boxes.generators.getBoxGenerator(name)
+
+    if generator is not None:
+        box = generator()
         box.translations = get_translation()
-        box.parseArgs(args)
-        box.open()
-        box.render()
-        data = box.close()
-        with os.fdopen(sys.stdout.fileno(), "wb", closefd=False) if box.output == "-" else open(box.output, 'wb') as f:
-            f.write(data.getvalue())
+        with profiled(profile, profile_output):
+            box.parseArgs(args)
+            box.open()
+            box.render()
+            data = box.close()
+            with os.fdopen(sys.stdout.fileno(), "wb", closefd=False) if box.output == "-" else open(box.output, 'wb') as f:
+                f.write(data.getvalue())
+        if profile:
+            print_timings(box)
     else:
         msg = f"Unknown generator '{name}'. Use boxes --list to get a list of available commands.\n"
         sys.stderr.write(msg)
 
 
+def run_job(job: dict) -> dict:
+    """Render a job and write the result to a file
+
+    A job has "generator", "output" and optionally "args" (a list of
+    command line arguments or a dict of argument names and values),
+    "format" and "id". Returns the job's entry for the results manifest.
+    Errors are reported there instead of raised.
+    """
+    result: dict = {}
+    if "id" in job:
+        result["id"] = job["id"]
+    start = time.perf_counter()
+    err = io.StringIO()
+    try:
+        # argparse reports errors on stderr
+        with contextlib.redirect_stderr(err):
+            name = result["generator"] = job.get("generator")
+            output = result["output"] = job.get("output")
+            if not output:
+                raise ValueError("no output given")
+            args = job.get("args", [])
+            if isinstance(args, dict):
+                args = [f"--{k}={v}" for k, v in args.items()]
+            args = [str(a) for a in args]
+            if "format" in job:
+                args.append(f"--format={job['format']}")
+            args.append(f"--output={output}")
+
+            generator = boxes.generators.getBoxGenerator(name or "")
+            if generator is None:
+                raise ValueError(f"Unknown generator '{name}'")
+            box = generator()
+            box.translations = get_translation()
+            box.parseArgs(args)
+            box.open()
+            box.render()
+            data = box.close()
+            with open(box.output, 'wb') as f:
+                f.write(data.getvalue())
+        result["status"] = "ok"
+    except (Exception, SystemExit) as e:
+        result["status"] = "error"
+        # only the message of argparse - not the whole usage
+        messages = err.getvalue().strip().splitlines()
+        result["error"] = messages[-1] if messages else f"{type(e).__name__}: {e}"
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def run_batch_job(line: tuple[int, str]) -> dict:
+    """Run a job given as line number and JSON text - see run_job()"""
+    lineno, text = line
+    try:
+        job = json.loads(text)
+        if not isinstance(job, dict):
+            raise ValueError("job is not a JSON object")
+    except ValueError as e:
+        return {"line": lineno, "status": "error", "error": f"{type(e).__name__}: {e}", "seconds": 0.0}
+    return {"line": lineno, **run_job(job)}
+
+
+def run_batch(jobs_file, manifest, jobs: int = 1) -> int:
+    """Render all jobs of the JSON lines file jobs_file
+
+    Writes one JSON line with status and time per job to manifest in
+    the order of the jobs. Uses jobs processes (0 for one per CPU).
+    Returns the number of failed jobs.
+    """
+    lines = ((nr, text) for nr, text in enumerate(jobs_file, 1) if text.strip())
+    failed = 0
+    for result in parallel_map(run_batch_job, lines, jobs):
+        if result["status"] != "ok":
+            failed += 1
+        manifest.write(json.dumps(result) + "\n")
+        manifest.flush()
+    return failed
+
+
+def parse_sweep(sweep: str) -> tuple[str, list[str]]:
+    """Parse PARAM=START:STOP:STEP or PARAM=VALUE,VALUE,...
+
+    Returns the parameter name and its values as strings. Ranges include
+    STOP and are calculated in decimal to get 0.3 instead of
+    0.30000000000000004.
+    """
+    param, sep, spec = sweep.partition("=")
+    if not sep or not param or not spec:
+        raise ValueError(f"Invalid sweep '{sweep}'. Use PARAM=START:STOP:STEP or PARAM=VALUE,VALUE,...")
+    if ":" not in spec:
+        return param, spec.split(",")
+    try:
+        start, stop, step = (decimal.Decimal(v) for v in spec.split(":"))
+    except (ValueError, decimal.InvalidOperation):
+        raise ValueError(f"Invalid range '{spec}' for {param}. Use START:STOP:STEP") from None
+    if step <= 0 or stop < start:
+        raise ValueError(f"Invalid range '{spec}' for {param}. Needs STEP > 0 and STOP >= START")
+    n = int((stop - start) / step)
+    return param, [str(start + i * step) for i in range(n + 1)]
+
+
+def sweep_output(output: str, variant) -> str:
+    """File name for a variant: the parameters are added to the stem"""
+    path = Path(output)
+    suffix = "_".join(f"{param}-{value}" for param, value in variant)
+    return str(path.with_name(f"{path.stem}_{suffix}{path.suffix}"))
+
+
+def args_error(generator, args) -> str | None:
+    """Return the error argparse reports for args - or None if they are fine"""
+    err = io.StringIO()
+    try:
+        with contextlib.redirect_stderr(err):
+            generator().parseArgs(args)
+    except (Exception, SystemExit) as e:
+        messages = err.getvalue().strip().splitlines()
+        return messages[-1] if messages else f"{type(e).__name__}: {e}"
+    return None
+
+
+def render_parts(job):
+    """Render a generator and return the parts of the drawing
+
+    job is the generator name and the list of arguments. Returns the
+    parts, the number of segments and an error message which is None
+    on success. Errors are not raised as they would kill the worker
+    process of the pool.
+    """
+    name, args = job
+    err = io.StringIO()
+    try:
+        with contextlib.redirect_stderr(err):
+            box = boxes.generators.getBoxGenerator(name)()
+            box.parseArgs(args)
+            box.open()
+            box.render()
+            box.ctx.stroke()
+    except (Exception, SystemExit) as e:
+        messages = err.getvalue().strip().splitlines()
+        return None, 0, messages[-1] if messages else f"{type(e).__name__}: {e}"
+    return box.surface.parts, box.surface.count, None
+
+
+def render_sweep_sheet(name, variant_args, labels, output, fmt, jobs: int = 1) -> int:
+    """Render all variants and lay them out on one sheet with labels
+
+    Nothing is written if a variant fails. Returns the number of failed
+    variants.
+    """
+    from affine import Affine
+
+    results = list(parallel_map(render_parts, [(name, args) for args in variant_args], jobs))
+    failed = 0
+    for label, (_, _, error) in zip(labels, results):
+        if error is not None:
+            failed += 1
+            print(f"FAILED: {label}: {error}")
+    if failed:
+        return failed
+    results = [(parts, count) for parts, count, _ in results]
+    all_extents = [sum([part.extents() for part in parts]) for parts, count in results]
+    spacing = 10.0
+    label_height = 10.0
+    cell_w = max(e.width for e in all_extents) + spacing
+    cell_h = max(e.height for e in all_extents) + label_height + spacing
+    columns = math.ceil(math.sqrt(len(results)))
+
+    sheet = boxes.Boxes()
+    sheet.parseArgs(["--reference=0", f"--format={fmt}", f"--output={output}"])
+    sheet.metadata["name"] = name
+    sheet.metadata["short_description"] = f"Parameter sweep of {name}"
+    sheet.metadata["description"] = ""
+    sheet.open()
+    for i, label in enumerate(labels):
+        x, y = (i % columns) * cell_w, -(i // columns) * cell_h
+        sheet.text(label, x, y, fontsize=5, color=boxes.Color.ANNOTATIONS)
+    sheet.ctx.stroke()
+    for i, ((parts, count), extents) in enumerate(zip(results, all_extents)):
+        x, y = (i % columns) * cell_w, -(i // columns) * cell_h + label_height
+        m = Affine.translation(x - extents.xmin, y - extents.ymin)
+        for part in parts:
+            part.transform(1.0, m)
+        sheet.surface.parts.extend(parts)
+        sheet.surface.count += count
+    data = sheet.close()
+    with os.fdopen(sys.stdout.fileno(), "wb", closefd=False) if output == "-" else open(output, 'wb') as f:
+        f.write(data.getvalue())
+    return 0
+
+
+def run_sweep(name: str, args, sweeps, sheet: bool = False, jobs: int = 1) -> int:
+    """Render the cartesian product of all values of the sweeps
+
+    Writes a file per variant or - if sheet is set - one file with all
+    of them. Returns the number of failed variants.
+    """
+    generator = boxes.generators.getBoxGenerator(name)
+    if generator is None:
+        sys.stderr.write(f"Unknown generator '{name}'. Use boxes --list to get a list of available commands.\n")
+        return 1
+    try:
+        params = [parse_sweep(sweep) for sweep in sweeps]
+    except ValueError as e:
+        sys.stderr.write(f"{e}\n")
+        return 1
+    variants = list(itertools.product(*[[(param, value) for value in values]
+                                        for param, values in params]))
+    variant_args = [args + [f"--{param}={value}" for param, value in variant]
+                    for variant in variants]
+    labels = [" ".join(f"{param}={value}" for param, value in variant)
+              for variant in variants]
+    # check the arguments before starting - argparse exits on errors
+    failed = 0
+    for label, a in zip(labels, variant_args):
+        error = args_error(generator, a)
+        if error is not None:
+            failed += 1
+            print(f"FAILED: {label}: {error}")
+    if failed:
+        return failed
+    box = generator()
+    box.parseArgs(variant_args[0])
+
+    if sheet:
+        failed = render_sweep_sheet(name, variant_args, labels, box.output, box.format, jobs)
+        if not failed:
+            print(f"{len(variants)} variants written to {box.output}")
+        return failed
+
+    jobs_list = [{"generator": name, "args": a, "output": sweep_output(box.output, variant)}
+                 for a, variant in zip(variant_args, variants)]
+    for result in parallel_map(run_job, jobs_list, jobs):
+        if result["status"] == "ok":
+            print(f"{result['output']} ({result['seconds']:.2f}s)")
+        else:
+            failed += 1
+            print(f"FAILED: {result['output']}: {result['error']}")
+    return failed
+
+
 def generator_groups():
     generators = generators_by_name()
     return group_generators(generators)
@@ -106,8 +472,9 @@ def group_generators(generators):
     return groups
 
 
-def generators_by_name() -> dict[str, type[boxes.Boxes]]:
-    all_generators = boxes.generators.getAllBoxGenerators()
+def generators_by_name() -> dict[str, boxes.generators.GeneratorInfo]:
+    """Infos of all generators - use .load() to get the class"""
+    all_generators = boxes.generators.getGeneratorIndex()
 
     return {
         name.split('.')[-1].lower(): generator
@@ -136,8 +503,15 @@ def main() -> None:
     parser.add_argument("--version", action="store_true", default=False)
     parser.add_argument("--list", action="store_true", default=False, help="List available generators.")
     parser.add_argument("--examples", action="store_true", default=False, help='Generates an SVG for every generator into the "examples" folder.')
+    parser.add_argument("--batch", type=str, default=None, metavar="JOBS.jsonl", help='Render the jobs in the file - one JSON object per line like {"generator": "ABox", "args": {"x": 100}, "output": "abox.svg"}. "-" reads stdin.')
+    parser.add_argument("--manifest", type=str, default="-", help="File to write the results of --batch to. Default: stdout")
+    parser.add_argument("--sweep", action="append", default=[], metavar="PARAM=START:STOP:STEP", help="Render the generator for each value of the parameter. Values can also be given as VALUE,VALUE,... Can be used multiple times to render all combinations. Writes one file per variant with the values added to the name.")
+    parser.add_argument("--sweep_sheet", action="store_true", default=False, help="Put all variants of --sweep on one labelled sheet instead.")
+    parser.add_argument("--profile", action="store_true", default=False, help="Profile rendering the generator. Prints the time of each phase and the slowest functions to stderr.")
+    parser.add_argument("--profile_output", type=str, default=None, metavar="FILE", help="Also save the profile to FILE, e.g. for snakeviz.")
+    parser.add_argument("--jobs", type=int, default=1, help="Number of processes used by --examples, --batch and --sweep. 0 for one per CPU.")
     args, extra = parser.parse_known_args()
-    if args.generator and (args.examples or args.list):
+    if args.generator and (args.examples or args.list or args.batch):
         parser.error("cannot combine --generator with other commands")
 
     # if debug is True set logging level
@@ -150,13 +524,24 @@ def main() -> None:
     elif args.list:
         print_grouped_generators()
     elif args.examples:
-        create_example_every_generator()
+        if create_example_every_generator(args.jobs):
+            sys.exit(1)
+    elif args.batch:
+        with contextlib.ExitStack() as stack:
+            jobs_file = sys.stdin if args.batch == "-" else stack.enter_context(open(args.batch))
+            manifest = sys.stdout if args.manifest == "-" else stack.enter_context(open(args.manifest, "w"))
+            if run_batch(jobs_file, manifest, args.jobs):
+                sys.exit(1)
     else:
         if args.generator:
             name = args.generator
         else:
             name = extra.pop(0).lower()
-        run_generator(name, extra)
+        if args.sweep:
+            if run_sweep(name, extra, args.sweep, args.sweep_sheet, args.jobs):
+                sys.exit(1)
+        else:
+            run_generator(name, extra, args.profile, args.profile_output)
 
 if __name__ == '__main__':
     # Setup basic logging
@@ -18,18 +18,26 @@ from __future__ import annotations
 import argparse
 import gettext
 import glob
+import gzip
+import hashlib
 import html
 import io
 import mimetypes
+import multiprocessing
 import os.path
 import re
+import selectors
+import shlex
+import signal
+import socket
 import sys
 import threading
 import time
 import traceback
+from collections import OrderedDict
 from typing import Any, NoReturn
 from urllib.parse import quote, unquote_plus
-from wsgiref.simple_server import make_server
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
 
 import markdown  # type: ignore
 import qrcode
@@ -82,6 +90,121 @@ class FileChecker(threading.Thread):
         self._stopped = True
 
 
+class PreforkServer:
+    """Serve with a number of forked worker processes
+
+    Everything that can be prepared - see BServer.warmUp() - is done in
+    the parent before forking so the workers share it. The workers accept
+    connections on the same listening socket. Workers that die are
+    replaced.
+
+    SIGHUP reloads gracefully: the workers finish their current request
+    and exit while the server executes itself again - keeping the
+    listening socket - and starts new workers. SIGTERM and SIGINT stop it.
+    """
+
+    LISTEN_FD = "BOXESSERVER_LISTEN_FD"
+
+    def __init__(self, host: str, port: int, app, workers: int) -> None:
+        self.app = app
+        self.nr_workers = workers
+        self.workers: set[int] = set()
+        self.stopping = False
+        self.reloading = False
+        fd = os.environ.pop(self.LISTEN_FD, None)
+        if fd is None:
+            self.httpd = make_server(host, port, app)
+        else:
+            # inherited from before the reload
+            self.httpd = WSGIServer((host, port), WSGIRequestHandler, bind_and_activate=False)
+            self.httpd.socket.close()
+            self.httpd.socket = socket.socket(fileno=int(fd))
+            self.httpd.server_address = self.httpd.socket.getsockname()
+            host, port = self.httpd.server_address[:2]
+            self.httpd.server_name = socket.getfqdn(host)
+            self.httpd.server_port = port
+            self.httpd.setup_environ()
+            self.httpd.set_app(app)
+        # Don't block in accept() if another worker was faster
+        self.httpd.socket.setblocking(False)
+
+    def _signal(self, signum, frame) -> None:
+        # SIGTERM also stops a reload that has not started yet
+        self.reloading = signum == signal.SIGHUP
+        self.stopping = True
+
+    def serve_forever(self) -> None:
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+            signal.signal(signum, self._signal)
+        while not self.stopping:
+            while len(self.workers) < self.nr_workers and not self.stopping:
+                self._startWorker()
+            self._reap()
+            time.sleep(0.2)
+        for pid in self.workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        if self.reloading:
+            # old workers finish their requests while the new ones start
+            fd = self.httpd.socket.fileno()
+            os.set_inheritable(fd, True)
+            os.environ[self.LISTEN_FD] = str(fd)
+            os.execv(sys.executable, [sys.executable] + sys.argv)
+        while self.workers:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            self.workers.discard(pid)
+        self.httpd.server_close()
+
+    def _reap(self) -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            # may also be a worker from before a reload
+            if pid in self.workers:
+                self.workers.discard(pid)
+                if not self.stopping:
+                    print(f"BoxesServer worker {pid} died - restarting it.")
+
+    def _startWorker(self) -> None:
+        pid = os.fork()
+        if pid:
+            self.workers.add(pid)
+            return
+        status = 0
+        try:
+            self._serveWorker()
+        except BaseException:
+            traceback.print_exc()
+            status = 1
+        finally:
+            os._exit(status)
+
+    def _serveWorker(self) -> None:
+        self.stopping = False
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, self._signal)
+        selector = selectors.DefaultSelector()
+        selector.register(self.httpd.socket, selectors.EVENT_READ)
+        while not self.stopping:
+            if selector.select(0.5):
+                self.httpd._handle_request_noblock()
+
+
+def quote_cli(arg: str) -> str:
+    """Quote an argument for the command line in the meta data"""
+    return shlex.quote(arg.replace('\r', '').replace('\n', "\\n"))
+
+
 def filter_url(url, non_default_args):
     if len(url) == 0:
         return ''
@@ -104,6 +227,156 @@ def filter_url(url, non_default_args):
         return f"{base}"
 
 
+class RenderCache:
+    """Least recently used cache for rendered files
+
+    Bounded by the number of entries and by the total size in bytes.
+    Entries are lists of chunks as returned by Boxes.close(stream=True).
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 64 * 2**20) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: OrderedDict[Any, tuple[list[bytes], int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, chunks: list[bytes]) -> None:
+        size = sum(len(c) for c in chunks)
+        if self.max_entries <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= old[1]
+            self._entries[key] = (chunks, size)
+            self.size += size
+            while (len(self._entries) > self.max_entries or
+                   self.size > self.max_bytes):
+                _, (_, s) = self._entries.popitem(last=False)
+                self.size -= s
+
+    def store(self, key, chunks):
+        """Pass chunks through and cache them once all are consumed"""
+        result = []
+        for chunk in chunks:
+            result.append(chunk)
+            yield chunk
+        self.put(key, result)
+
+
+def accepts_encoding(environ, encoding: str) -> bool:
+    """Check the Accept-Encoding header of the request for encoding"""
+    for item in environ.get("HTTP_ACCEPT_ENCODING", "").split(","):
+        name, _, params = item.partition(";")
+        if name.strip().lower() not in (encoding, "*"):
+            continue
+        params = params.replace(" ", "")
+        if params.startswith("q="):
+            try:
+                return float(params[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+class StaticFile:
+    """A file of the static dir kept in memory"""
+
+    # Types worth compressing. Others are compressed already.
+    compressible = ("text/", "image/svg+xml", "application/javascript", "application/json")
+
+    def __init__(self, path: str, filename: str) -> None:
+        with open(path, "rb") as f:
+            self.data = f.read()
+        self.version = hashlib.sha1(self.data).hexdigest()[:12]
+        self.etag = f'"{self.version}"'
+
+        type_, encoding = mimetypes.guess_type(filename)
+        if encoding is None:
+            encoding = "utf-8"
+        # Images do not have charset. Just bytes. Except text based svg.
+        # Todo: fallback if type_ is None?
+        if type_ is not None and "image" in type_ and type_ != "image/svg+xml":
+            self.content_type = "%s" % type_
+        else:
+            self.content_type = f"{type_}; charset={encoding}"
+
+        self.gzipped: bytes | None = None
+        if type_ is not None and type_.startswith(self.compressible):
+            gzipped = gzip.compress(self.data, 9, mtime=0)
+            if len(gzipped) < len(self.data):
+                self.gzipped = gzipped
+
+
+class PreviewRegistry:
+    """Newest preview request number of each browser tab
+
+    Lives in shared memory so forked workers see the requests handled by
+    the others. Tabs are hashed into a fixed number of slots. If two tabs
+    share a slot, renders of the one that lost it are no longer
+    cancelled.
+    """
+
+    def __init__(self, slots: int = 4096) -> None:
+        self.slots = slots
+        # tab hash and sequence number for each slot
+        self.table = multiprocessing.RawArray("Q", 2 * slots)
+        self.lock = multiprocessing.Lock()
+
+    def _slot(self, tab: str) -> tuple[int, int]:
+        """Index into the table and id of the tab"""
+        digest = hashlib.sha1(tab.encode()).digest()
+        slot = int.from_bytes(digest[:4], "little") % self.slots
+        return 2 * slot, int.from_bytes(digest[4:12], "little")
+
+    def register(self, tab: str, seq: int) -> None:
+        i, tab_id = self._slot(tab)
+        with self.lock:
+            if self.table[i] != tab_id or self.table[i + 1] < seq:
+                self.table[i] = tab_id
+                self.table[i + 1] = seq
+
+    def superseded(self, tab: str, seq: int) -> bool:
+        """Whether a newer request of the tab has been registered"""
+        i, tab_id = self._slot(tab)
+        return self.table[i] == tab_id and self.table[i + 1] > seq
+
+
+class RenderWorkerError(Exception):
+    """Rendering failed in the worker process - already reported there"""
+
+
+def renderWorker(box, conn) -> None:
+    """Render box in a forked process and send the result through conn"""
+    try:
+        box.open()
+        box.render()
+        result: Any = box.close().getvalue()
+    except ValueError as e:
+        result = ValueError(str(e))
+    except boxes.RenderCancelled as e:
+        result = e
+    except Exception as e:
+        print("Exception during rendering:")
+        traceback.print_exc()
+        result = RenderWorkerError(str(e))
+    conn.send((result, box.timings, box.counters))
+    conn.close()
+
+
 class ArgumentParserError(Exception): pass
 
 
@@ -119,7 +392,10 @@ boxes.ArgumentParser = ThrowingArgumentParser  # type: ignore
 class BServer:
     lang_re = re.compile(r"([a-z]{2,3}(-[-a-zA-Z0-9]*)?)\s*(;\s*q=(\d\.?\d*))?")
 
-    def __init__(self, url_prefix="", static_url="static", static_path="../static/", legal_url="") -> None:
+    def __init__(self, url_prefix="", static_url="static", static_path="../static/", legal_url="",
+                 cache_entries: int = 256, cache_size: int = 64 * 2**20,
+                 render_timeout: float | None = None, max_segments: int | None = None,
+                 max_age: int = 3600, isolate_renders: bool = False) -> None:
         self.boxes = {b.__name__: b for b in boxes.generators.getAllBoxGenerators().values() if b.webinterface}
         self.groups = boxes.generators.ui_groups
         self.groups_by_name = boxes.generators.ui_groups_by_name
@@ -135,12 +411,106 @@ class BServer:
             self.staticdir = os.path.join(os.path.dirname(__file__), '../static/')
             if not os.path.isdir(self.staticdir):
                 self.staticdir = os.path.join(os.path.dirname(__file__), '..', '../static/')
+        self.static = self.loadStatic()
         self._languages = None
         self._cache: dict[Any, Any] = {}
+        self.renderCache = RenderCache(cache_entries, cache_size)
+        self.previews = PreviewRegistry()
+        self.render_timeout = render_timeout or None
+        self.max_segments = max_segments
+        self.isolate_renders = isolate_renders
+        self.max_age = max_age
+        self._code_version: str | None = None
         self.url_prefix = url_prefix
         self.static_url = static_url
         self.legal_url = legal_url
 
+    def loadStatic(self) -> dict[str, StaticFile]:
+        """Read all files of the static dir into memory"""
+        static = {}
+        for root, dirs, files in os.walk(self.staticdir):
+            for fn in files:
+                path = os.path.join(root, fn)
+                filename = os.path.relpath(path, self.staticdir).replace(os.path.sep, "/")
+                if re.fullmatch(r"[a-zA-Z0-9_/-]+\.[a-zA-Z0-9]+", filename):
+                    static[filename] = StaticFile(path, filename)
+        return static
+
+    def staticVersion(self, filename: str) -> str:
+        """Query string with the content hash of a static file
+
+        URLs with it can be cached forever as they change with the content.
+        """
+        f = self.static.get(filename)
+        return f"?v={f.version}" if f else ""
+
+    def staticURL(self, filename: str) -> str:
+        return f"{self.static_url}/{filename}{self.staticVersion(filename)}"
+
+    # seconds to wait for the render process after the render_timeout
+    # before killing it
+    kill_grace = 2.0
+
+    def renderBox(self, box):
+        """Render box and return the output as iterable of bytes chunks
+
+        With a render_timeout the drawing code aborts when it is used up.
+        The output is generated completely before it is returned, so all
+        errors show up before the response is started - a failure in a
+        later chunk would otherwise end in a truncated "200 OK".
+
+        With isolate_renders the render also runs in a forked process
+        that gets killed kill_grace seconds after the render_timeout. This
+        also stops renders that are stuck outside of the drawing code but
+        costs a fork per render and the output is sent in one piece.
+        """
+        box.max_segments = self.max_segments
+        box.max_render_time = self.render_timeout
+        if (not self.isolate_renders or not self.render_timeout or
+                not hasattr(os, "fork")):
+            box.open()
+            box.render()
+            return list(box.close(stream=True))
+
+        mp = multiprocessing.get_context("fork")
+        reader, writer = mp.Pipe(duplex=False)
+        process = mp.Process(target=renderWorker, args=(box, writer), daemon=True)
+        process.start()
+        writer.close()
+        try:
+            if not reader.poll(self.render_timeout + self.kill_grace):
+                raise boxes.drawing.RenderBudgetExceeded("Rendering took too long")
+            result, box.timings, box.counters = reader.recv()
+        except EOFError:
+            raise RenderWorkerError("Rendering process died") from None
+        finally:
+            reader.close()
+            process.kill()
+            process.join()
+        if isinstance(result, Exception):
+            raise result
+        return (result,)
+
+    def warmUp(self) -> None:
+        """Do the work that is shared by all requests up front
+
+        Used before forking workers so they can share the result.
+        """
+        self.codeVersion()
+        self.preRender()
+        import shapely.geometry  # used by fillHoles()
+        for name, box_cls in self.boxes.items():
+            try:
+                box = box_cls()
+                box.parseArgs([])  # builds the argument parser
+            except Exception:
+                pass
+        # records the layout of the default edges
+        box = self.boxes["ABox"]()
+        box.parseArgs([])
+        box.open()
+        box.close()
+
     def getLanguages(self, domain=None, localedir=None):
         if self._languages is not None:
             return self._languages
@@ -241,14 +611,14 @@ class BServer:
     {self.genHTMLCSS()}
     {self.genHTMLJS()}
 </head>
-<body onload="initArgsPage({len(box.argparser._action_groups) - 3})">
+<body onload="initArgsPage({len(box.argparser._action_groups) - 4})">
 
 <div class="argumentcontainer">
 <div style="float: left;">
 <a href="./{langparam}"><h1>{_("Boxes.py")}</h1></a>
 </div>
 <div style="width: 120px; float: right;">
-<img alt="self-Logo" src="{self.static_url}/boxes-logo.svg" width="120">
+<img alt="self-Logo" src="{self.staticURL("boxes-logo.svg")}" width="120">
 </div>
 <div>
 <div class="clear"></div>
@@ -265,12 +635,18 @@ class BServer:
 <form id="arguments" action="{action}" method="GET" rel="nofollow">
         """]
         groupid = 0
-        for group in box.argparser._action_groups[3:] + box.argparser._action_groups[:3]:
+        # positional, generator, default and plotter settings go last
+        for group in box.argparser._action_groups[4:] + box.argparser._action_groups[:4]:
             if not group._group_actions:
                 continue
             if len(group._group_actions) == 1 and isinstance(group._group_actions[0], argparse._HelpAction):
                 continue
             prefix = getattr(group, "prefix", None)
+            formats = getattr(group, "formats", None)
+            if formats:
+                # shown by self.js only while one of the formats is selected
+                hidden = "" if defaults.get("format", box.argparser.get_default("format")) in formats else " hidden"
+                result.append(f'''<div data-formats="{" ".join(formats)}"{hidden}>\n''')
             result.append(f'''<h3 id="h-{groupid}" data-id="{groupid}" role="button" aria-expanded="true" tabindex="0" class="toggle open">{_(group.title)}</h3>\n<table role="presentation" id="{groupid}">\n''')
 
             for a in group._group_actions:
@@ -278,6 +654,8 @@ class BServer:
                     continue
                 result.append(self.arg2html(a, prefix, defaults, _))
             result.append("</table>")
+            if formats:
+                result.append("</div>\n")
             groupid += 1
 
         result.append(f"""
@@ -304,7 +682,7 @@ class BServer:
                 .replace('src="static/', f'src="{self.static_url}/'))
 
         result.append(f'''<div>
-<img style="width:100%;" src="{self.static_url}/samples/{box.__class__.__name__}.jpg" onerror="this.parentElement.innerHTML = '{no_img_msg}';" alt="Picture of box.">
+<img style="width:100%;" src="{self.staticURL(f"samples/{box.__class__.__name__}.jpg")}" onerror="this.parentElement.innerHTML = '{no_img_msg}';" alt="Picture of box.">
 </div>
 </div>
 </div>
@@ -317,7 +695,7 @@ class BServer:
   </div>
 <div style="overflow: auto;">
 <figure id="preview_figure" style="width: max-content;">
-<img id="preview_img" style="width:100%" src="{self.static_url}/nothing.png">
+<img id="preview_img" style="width:100%" src="{self.staticURL("nothing.png")}">
 </figure>
 </div>
 </div>
@@ -352,13 +730,13 @@ class BServer:
 </div>
 <br>
 <div class="menu" style="width: 100%">
-<img style="width: 200px;" id="sample-preview" src="{self.static_url}/nothing.png" alt="">
+<img style="width: 200px;" id="sample-preview" src="{self.staticURL("nothing.png")}" alt="">
 """]
         for nr, group in enumerate(self.groups):
             result.append(f'''
 <h3 id="h-{nr}"
     data-id="{nr}"
-    data-thumbnail="{self.static_url}/samples/{group.thumbnail}"
+    data-thumbnail="{self.staticURL(f"samples/{group.thumbnail}")}"
     role="button"
     aria-expanded="false"
     class="toggle thumbnail open"
@@ -372,7 +750,7 @@ class BServer:
                 docs = ""
                 if box.__doc__:
                     docs = " - " + _(box.__doc__)
-                result.append(f"""     <li class="thumbnail" data-thumbnail="{self.static_url}/samples/{name}-thumb.jpg" id="search_id_{name}"><a href="{name}{langparam}">{_(name)}</a>{docs}</li>\n""")
+                result.append(f"""     <li class="thumbnail" data-thumbnail="{self.staticURL(f"samples/{name}-thumb.jpg")}" id="search_id_{name}"><a href="{name}{langparam}">{_(name)}</a>{docs}</li>\n""")
             result.append("   </ul>\n  </div>\n")
         result.append(f"""
 </div>
@@ -395,12 +773,26 @@ class BServer:
 
         return "<!DOCTYPE html><html>"
 
+    def genPageMenu_cached(self, lang):
+        lang_name = lang.info().get('language', None)
+        if lang_name not in self._cache:
+            self._cache[lang_name] = list(self.genPageMenu(lang))
+        return self._cache[lang_name]
+
+    def preRender(self) -> None:
+        """Render the gallery and the menu for all languages up front"""
+        for language in [None] + self.getLanguages():
+            args = [f"language={language}"] if language else []
+            lang = self.getLanguage(args, "")
+            self.genPageGallery(lang)
+            self.genPageMenu_cached(lang)
+
     def genHTMLMeta(self) -> str:
         return f'''
     <meta charset="utf-8">
     <meta name="viewport" content="width=device-width, initial-scale=1">
-    <link rel="icon" type="image/svg+xml" href="{self.static_url}/boxes-logo.svg" sizes="any">
-    <link rel="icon" type="image/x-icon" href="{self.static_url}/favicon.ico">
+    <link rel="icon" type="image/svg+xml" href="{self.staticURL("boxes-logo.svg")}" sizes="any">
+    <link rel="icon" type="image/x-icon" href="{self.staticURL("favicon.ico")}">
 '''
 
     def genHTMLMetaLanguageLink(self) -> str:
@@ -413,10 +805,10 @@ class BServer:
         return s
 
     def genHTMLCSS(self) -> str:
-        return f'<link rel="stylesheet" href="{self.static_url}/self.css">'
+        return f'<link rel="stylesheet" href="{self.staticURL("self.css")}">'
 
     def genHTMLJS(self) -> str:
-        return f'<script src="static/self.js"></script>'
+        return f'<script src="static/self.js{self.staticVersion("self.js")}"></script>'
 
     def genHTMLLanguageSelection(self, lang) -> str:
         """Generates a dropdown selection for the language change."""
@@ -456,7 +848,7 @@ class BServer:
 </div>
 
 <div style="width: 25%; float: left;">
-<img alt="self-Logo" src="{self.static_url}/boxes-logo.svg" width="250">
+<img alt="self-Logo" src="{self.staticURL("boxes-logo.svg")}" width="250">
 </div>
 
 <div>
@@ -521,28 +913,32 @@ class BServer:
 
     def serveStatic(self, environ, start_response):
         filename = environ["PATH_INFO"][len("/static/"):]
-        path = os.path.join(self.staticdir, filename)
-        if (not re.match(r"[a-zA-Z0-9_/-]+\.[a-zA-Z0-9]+", filename) or
-                not os.path.exists(path)):
+        f = self.static.get(filename)
+        if f is None:
             if re.match(r"samples/.*-thumb.jpg", filename):
-                path = os.path.join(self.staticdir, "nothing.png")
-            else:
+                f = self.static.get("nothing.png")
+            if f is None:
                 start_response("404 Not Found", [('Content-type', 'text/plain')])
                 return [b"Not found"]
 
-        type_, encoding = mimetypes.guess_type(filename)
-        if encoding is None:
-            encoding = "utf-8"
-
-        # Images do not have charset. Just bytes. Except text based svg.
-        # Todo: fallback if type_ is None?
-        if type_ is not None and "image" in type_ and type_ != "image/svg+xml":
-            start_response("200 OK", [('Content-type', "%s" % type_)])
+        if "v=" + f.version in environ.get("QUERY_STRING", "").split("&"):
+            cache_control = "public, max-age=31536000, immutable"
         else:
-            start_response("200 OK", [('Content-type', f"{type_}; charset={encoding}")])
-
-        f = open(path, 'rb')
-        return environ['wsgi.file_wrapper'](f, 512 * 1024)
+            cache_control = f"public, max-age={self.max_age}"
+        headers = [("ETag", f.etag), ("Cache-Control", cache_control)]
+        if f.gzipped is not None:
+            headers.append(("Vary", "Accept-Encoding"))
+        if self.etagMatches(environ, f.etag):
+            start_response("304 Not Modified", headers)
+            return []
+
+        data = f.data
+        if f.gzipped is not None and accepts_encoding(environ, "gzip"):
+            data = f.gzipped
+            headers.append(("Content-Encoding", "gzip"))
+        headers += [('Content-type', f.content_type), ("Content-Length", str(len(data)))]
+        start_response("200 OK", headers)
+        return [data]
 
     def getURL(self, environ) -> str:
         url = environ['wsgi.url_scheme'] + '://'
@@ -567,11 +963,13 @@ class BServer:
         return url
 
     def serveGallery(self, environ, start_response, lang):
+        start_response("200 OK", [('Content-type', "text/html; charset=utf-8")])
+        return self.genPageGallery(lang)
+
+    def genPageGallery(self, lang):
         _ = lang.gettext
         lang_name = lang.info().get('language', None)
 
-        start_response("200 OK", [('Content-type', "text/html; charset=utf-8")])
-
         if ("Gallery", lang_name) in self._cache:
             return self._cache[("Gallery", lang_name)]
 
@@ -602,11 +1000,10 @@ class BServer:
             for box in group.generators:
                 name = box.__name__
                 fn = f"samples/{name}-thumb.jpg"
-                thumbnail = f"{self.static_url}/{fn}"
-                static_filename = os.path.join(self.staticdir, fn)
+                thumbnail = self.staticURL(fn)
                 alt = f"{_(name)}"
                 href = f"{name}{langparam}"
-                if not os.path.exists(static_filename):
+                if fn not in self.static:
                     result.append(f"""  <span class="gallery_missing" id="search_id_{name}"><a href="{href}">{_(box.__doc__)}<br><br>{_(name)}</a></span>\n""")
                 else:
                     result.append(f"""  <span class="gallery" id="search_id_{name}"><a title="{_(name)} - {html.escape(_(box.__doc__))}" href="{href}"><img alt="{alt}" src="{thumbnail}"><br>{_(name)}</a></span>\n""")
@@ -621,7 +1018,137 @@ class BServer:
         self._cache[("Gallery", lang_name)] = [s.encode("utf-8") for s in result]
         return self._cache[("Gallery", lang_name)]
 
+    def renderCacheKey(self, name, box, lang, render):
+        """Key for the render cache
+
+        The generator, the non default arguments, the format, the language
+        (used for texts in the drawing), the render mode and the URL as it
+        ends up in the meta data. The URL is normalised by
+        .normalizeMetadata() so requests with the same arguments in a
+        different order or with default values spelled out share the entry.
+        """
+        args = tuple(sorted((k, repr(v)) for k, v in box.non_default_args.items()))
+        return (name, args, box.format, lang.info().get('language', None),
+                render, box.metadata["url"])
+
+    def normalizeMetadata(self, box, environ, render) -> None:
+        """Make the meta data of box only depend on the cache key
+
+        Cached renders are shared by all equivalent requests. So the URL
+        and the command line list the non default arguments sorted - in
+        the URL followed by the render mode.
+        """
+        query = {}
+        for arg in environ.get("QUERY_STRING", "").split("&"):
+            key = unquote_plus(arg.split("=")[0])
+            if key in box.non_default_args:
+                query[key] = arg  # the last one counts as in argparse
+        cli = "boxes " + box.__class__.__name__ + " " + " ".join(
+            quote_cli("--" + unquote_plus(query[key])) for key in sorted(query))
+        box.metadata["cli"] = box.metadata["cli_short"] = cli.strip()
+        url = self.getURL({**environ, "QUERY_STRING": ""})
+        url += "?" + "&".join([query[key] for key in sorted(query)] + [f"render={render}"])
+        box.metadata["url"] = url
+        box.metadata["url_short"] = filter_url(url, box.non_default_args)
+
+    # formats worth compressing for the transfer - text based ones
+    compress_formats = ("svg", "svg_Ponoko", "ps", "lbrn2", "dxf", "plt", "gcode")
+
+    def codeVersion(self) -> str:
+        """Digest of the sources of the boxes package
+
+        Changes with every change of the code - not only with releases.
+        """
+        if self._code_version is None:
+            digest = hashlib.sha1()
+            base = os.path.dirname(os.path.abspath(boxes.__file__))
+            for root, dirs, files in os.walk(base):
+                dirs.sort()
+                for fn in sorted(files):
+                    if fn.endswith(".py"):
+                        path = os.path.join(root, fn)
+                        digest.update(os.path.relpath(path, base).encode())
+                        with open(path, "rb") as f:
+                            digest.update(f.read())
+            self._code_version = digest.hexdigest()
+        return self._code_version
+
+    def renderETag(self, cache_key) -> str:
+        """ETag of a reproducible render
+
+        Derived from the normalised cache key - see .renderCacheKey() -
+        so all equivalent requests get the same ETag. The code version
+        is added as the output changes with the code.
+        """
+        digest = hashlib.sha1(repr(cache_key).encode())
+        digest.update(self.codeVersion().encode())
+        return f'"{digest.hexdigest()}"'
+
+    @staticmethod
+    def etagMatches(environ, etag: str) -> bool:
+        """Check the If-None-Match header of the request against etag"""
+        if_none_match = environ.get("HTTP_IF_NONE_MATCH")
+        if not if_none_match:
+            return False
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag.startswith("W/"):
+                tag = tag[2:]
+            if tag in (etag, "*"):
+                return True
+        return False
+
+    def renderCacheHeaders(self, etag: str, compress: bool = False) -> list[tuple[str, str]]:
+        """Caching headers for reproducible renders"""
+        # the language may come from the Accept-Language header
+        vary = "Accept-Language, Accept-Encoding" if compress else "Accept-Language"
+        return [("ETag", etag),
+                ("Cache-Control", f"public, max-age={self.max_age}"),
+                ("Vary", vary)]
+
+    @staticmethod
+    def serverTiming(box, start: float, cached: bool = False) -> tuple[str, str]:
+        """Server-Timing header with the render phases and counters
+
+        Only shows what happened before the response starts. Most of the
+        output is written while it is being sent.
+        """
+        if cached:
+            metrics = ["cache;desc=hit"]
+        else:
+            metrics = [f"{phase};dur={seconds * 1000:.1f}"
+                       for phase, seconds in box.timings.items()]
+            metrics.extend(f"{name};desc={count}"
+                           for name, count in box.counters.items())
+        metrics.append(f"total;dur={(time.perf_counter() - start) * 1000:.1f}")
+        return ("Server-Timing", ", ".join(metrics))
+
+    def previewCancelCheck(self, environ):
+        """Register a preview request
+
+        The preview script of the web page sends a random id of the
+        browser tab and a sequence number with each request. Returns a
+        function that tells whether a newer request of the same tab came
+        in - or None if the headers are missing.
+
+        Cancelling needs the newer request to be handled while the older
+        one renders - i.e. --workers 2 or more. The default single process
+        server handles one request after the other and never cancels. The
+        preview script still debounces the requests and drops outdated
+        results there.
+        """
+        tab = environ.get("HTTP_X_PREVIEW_TAB")
+        try:
+            seq = int(environ.get("HTTP_X_PREVIEW_SEQ", ""))
+        except ValueError:
+            return None
+        if not tab:
+            return None
+        self.previews.register(tab, seq)
+        return lambda: self.previews.superseded(tab, seq)
+
     def serve(self, environ, start_response):
+        start = time.perf_counter()
         # serve favicon from static for generated SVGs
         if environ["PATH_INFO"] == "favicon.ico":
             environ["PATH_INFO"] = "/static/favicon.ico"
@@ -652,15 +1179,20 @@ class BServer:
         box_cls = self.boxes.get(name, None)
         if not box_cls:
             start_response(status, headers)
+            return self.genPageMenu_cached(lang)
 
-            lang_name = lang.info().get('language', None)
-            if lang_name not in self._cache:
-                self._cache[lang_name] = list(self.genPageMenu(lang))
-            return self._cache[lang_name]
+        if render == "4":
+            cancel_check = self.previewCancelCheck(environ)
+            if cancel_check is not None and cancel_check():
+                start_response("204 No Content", [])
+                return []
+        else:
+            cancel_check = None
 
         box = box_cls()
 
         box.translations = lang
+        box.cancel_check = cancel_check
 
         if render == "0":
             defaults = {}
@@ -687,11 +1219,36 @@ class BServer:
             box.metadata["url"] = self.getURL(environ)
             box.metadata["url_short"] = filter_url(box.metadata["url"],
                                                    box.non_default_args)
-            box.open()
-            box.render()
-            data = box.close()
+            cache_key = None
+            etag = None
+            data = None
+            compress = box.format in self.compress_formats
+            gzipped = compress and accepts_encoding(environ, "gzip")
+            if render in ("1", "2", "4"):
+                box.metadata["reproducible"] = True
+                self.normalizeMetadata(box, environ, render)
+                cache_key = self.renderCacheKey(name, box, lang, render)
+                if gzipped:
+                    # cache the compressed data to compress only once
+                    cache_key += ("gzip",)
+                etag = self.renderETag(cache_key)
+                if self.etagMatches(environ, etag):
+                    start_response("304 Not Modified", self.renderCacheHeaders(etag, compress))
+                    return []
+                data = self.renderCache.get(cache_key)
+            cached = data is not None
+            if data is None:
+                data = self.renderBox(box)
+                if gzipped:
+                    data = boxes.formats.gzip_chunks(data)
+                if cache_key is not None:
+                    data = self.renderCache.store(cache_key, data)
+        except boxes.RenderCancelled:
+            # superseded preview - nobody is waiting for the result
+            start_response("204 No Content", [])
+            return []
         except Exception as e:
-            if not isinstance(e, ValueError):
+            if not isinstance(e, (ValueError, RenderWorkerError)):
                 print("Exception during rendering:")
                 traceback.print_exc()
             if render == "4" and isinstance(e, ValueError):
@@ -719,8 +1276,13 @@ class BServer:
             if extension == "svg_Ponoko":
                 extension = "svg"
             http_headers.append(('Content-Disposition', f'attachment; filename="{box.__class__.__name__}.{extension}"'))
+        if etag is not None:
+            http_headers.extend(self.renderCacheHeaders(etag, compress))
+        if gzipped:
+            http_headers.append(("Content-Encoding", "gzip"))
+        http_headers.append(self.serverTiming(box, start, cached))
         start_response(status, http_headers)
-        return environ['wsgi.file_wrapper'](data, 512 * 1024)
+        return data
 
 
 def get_qrcode(url, format):
@@ -732,6 +1294,23 @@ def get_qrcode(url, format):
     return image_bytes.getvalue()
 
 
+# seconds a render may take if not configured otherwise
+DEFAULT_RENDER_TIMEOUT = 30.0
+
+
+def wsgi_server(environ) -> BServer:
+    """Create the server for the WSGI entry point (application)
+
+    There are no command line options there so it is configured by the
+    environment variables STATIC_URL (URL of static content) and
+    RENDER_TIMEOUT (maximum time in seconds a render may take, 0 for no
+    limit, default 30).
+    """
+    static_url = environ.get('STATIC_URL', 'https://florianfesti.github.io/boxes/static')
+    render_timeout = float(environ.get('RENDER_TIMEOUT', DEFAULT_RENDER_TIMEOUT))
+    return BServer(static_url=static_url, render_timeout=render_timeout)
+
+
 def main() -> None:
     parser = argparse.ArgumentParser()
 
@@ -745,12 +1324,43 @@ def main() -> None:
                         help="location of static content on disk")
     parser.add_argument("--legal_url", default="",
                         help="URL of legal web page")
+    parser.add_argument("--cache_entries", type=int, default=256,
+                        help="number of rendered files kept in memory (0 disables the cache)")
+    parser.add_argument("--cache_size", type=float, default=64,
+                        help="maximum size of the render cache in MiB")
+    parser.add_argument("--render_timeout", type=float, default=DEFAULT_RENDER_TIMEOUT,
+                        help="maximum time in seconds a render may take (0 for no limit). Checked by the drawing code while rendering.")
+    parser.add_argument("--isolate_renders", action="store_true", default=False,
+                        help="render in a forked process that is killed if it exceeds --render_timeout - even if stuck outside of the drawing code. Costs a fork per render.")
+    parser.add_argument("--max_segments", type=int, default=boxes.drawing.Surface.max_segments,
+                        help="maximum number of path segments a render may create")
+    parser.add_argument("--max_age", type=int, default=3600,
+                        help="seconds clients and proxies may cache rendered files without asking again")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="number of worker processes to fork. 0 serves in a single process and restarts on code changes. Send SIGHUP to reload the workers. Previews superseded while rendering are only cancelled with 2 or more workers - the single process server renders them to the end.")
     args = parser.parse_args()
 
     boxserver = BServer(url_prefix=args.url_prefix, static_url=args.static_url,
-                        static_path=args.static_path)
-
-    fc = FileChecker()
+                        static_path=args.static_path,
+                        cache_entries=args.cache_entries,
+                        cache_size=int(args.cache_size * 2**20),
+                        render_timeout=args.render_timeout,
+                        max_segments=args.max_segments,
+                        max_age=args.max_age,
+                        isolate_renders=args.isolate_renders)
+
+    if args.workers > 0:
+        if not hasattr(os, "fork"):
+            parser.error("--workers is not supported on this platform")
+        boxserver.warmUp()
+        server = PreforkServer(args.host, args.port, boxserver.serve, args.workers)
+        print(f"BoxesServer serving on http://{args.host if args.host else '*'}:{args.port}/ with {args.workers} workers...")
+        server.serve_forever()
+        print("BoxesServer stops.")
+        return
+
+    boxserver.preRender()
+    fc = FileChecker(files=[os.path.join(boxserver.staticdir, fn) for fn in boxserver.static])
     fc.start()
 
     httpd = make_server(args.host, args.port, boxserver.serve)
@@ -766,6 +1376,6 @@ def main() -> None:
 if __name__ == "__main__":
     main()
 else:
-    static_url = os.environ.get('STATIC_URL', 'https://florianfesti.github.io/boxes/static')
-    boxserver = BServer(static_url=static_url)
+    boxserver = wsgi_server(os.environ)
+    boxserver.preRender()
     application = boxserver.serve
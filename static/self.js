@@ -95,13 +95,23 @@ function initPage(num_hide = null) {
     for (let el of t) initThumbnail(el);
 }
 
+function updateFormatGroups() {
+    // groups of settings only used for some formats
+    const format = document.getElementById("format").value;
+    for (let el of document.querySelectorAll("[data-formats]"))
+	el.hidden = !el.getAttribute("data-formats").split(" ").includes(format);
+}
+
 function initArgsPage(num_hide = null) {
     initPage(num_hide);
+    updateFormatGroups();
+    document.getElementById("format").addEventListener("change", updateFormatGroups);
     const i = document.querySelectorAll("td > input, td > select, td > textarea");
     for (let el of i) {
 	el.addEventListener("change", refreshPreview);
+	el.addEventListener("input", refreshPreview);
     }
-    refreshPreview();
+    loadPreview();
     document.getElementById("preview_chk").addEventListener("change", togglePreview);
 }
 
@@ -109,7 +119,20 @@ function initArgsPage(num_hide = null) {
 
 preview_scale=100;
 
+// Requests carry an id of the tab and a sequence number. The server stops
+// rendering previews that got superseded by a newer request of the tab.
+const preview_tab = Math.random().toString(36).slice(2);
+let preview_seq = 0;
+let preview_shown = 0;
+let preview_timer = null;
+
 function refreshPreview() {
+    // wait for the user to stop typing
+    clearTimeout(preview_timer);
+    preview_timer = setTimeout(loadPreview, 300);
+}
+
+function loadPreview() {
     if (document.getElementById("preview_img").hidden)
 	return;
 
@@ -118,15 +141,28 @@ function refreshPreview() {
     formData.set("format", "svg");
 
     const url = form.action + "?" + new URLSearchParams(formData).toString() + "&render=4";
-
-    const preview = document.getElementById("preview_img");
-    preview.src = url;
+    const seq = ++preview_seq;
+
+    fetch(url, {headers: {"X-Preview-Tab": preview_tab, "X-Preview-Seq": seq}})
+	.then(response => response.status == 200 ? response.blob() : null)
+	.then(blob => {
+	    // cancelled or overtaken by a newer preview
+	    if (!blob || seq < preview_shown)
+		return;
+	    preview_shown = seq;
+	    const preview = document.getElementById("preview_img");
+	    const old = preview.src;
+	    preview.src = URL.createObjectURL(blob);
+	    if (old.startsWith("blob:"))
+		URL.revokeObjectURL(old);
+	})
+	.catch(() => {});
 }
 
 function togglePreview() {
     document.getElementById("preview").hidden = !event.target.checked;
     if (event.target.checked)
-	refreshPreview();
+	loadPreview();
 }
 
 /*** GrindFinity ******************************************/
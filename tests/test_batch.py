@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import io
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from boxes.scripts.boxes_main import run_batch
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def jobs_file(tmp_path: Path) -> io.StringIO:
+    jobs = [
+        {"id": "a", "generator": "ABox", "args": {"x": 80, "y": 60}, "output": str(tmp_path / "a.svg")},
+        {"generator": "ABox", "args": ["--h=50"], "format": "dxf", "output": str(tmp_path / "sub.name.dxf")},
+        "not json",
+        ["ABox"],
+        {"generator": "NoSuchBox", "output": str(tmp_path / "x.svg")},
+        {"generator": "ABox", "args": {"x": "abc"}, "output": str(tmp_path / "bad.svg")},
+        {"generator": "ABox"},
+    ]
+    lines = [job if isinstance(job, str) else json.dumps(job) for job in jobs]
+    lines.insert(2, "")  # empty lines are skipped but counted
+    return io.StringIO("\n".join(lines) + "\n")
+
+
+def run(tmp_path: Path, jobs: int) -> tuple[int, list[dict]]:
+    manifest = io.StringIO()
+    failed = run_batch(jobs_file(tmp_path), manifest, jobs)
+    return failed, [json.loads(line) for line in manifest.getvalue().splitlines()]
+
+
+def test_batch(tmp_path: Path) -> None:
+    failed, results = run(tmp_path, 1)
+    assert failed == 5
+    assert [r["line"] for r in results] == [1, 2, 4, 5, 6, 7, 8]
+    assert [r["status"] for r in results] == ["ok", "ok"] + ["error"] * 5
+    assert results[0]["id"] == "a"
+    # the output is written to exactly the given file
+    assert results[1]["output"] == str(tmp_path / "sub.name.dxf")
+    assert (tmp_path / "a.svg").read_bytes().startswith(b"<?xml")
+    assert (tmp_path / "sub.name.dxf").read_bytes().startswith(b"0\nSECTION")
+    errors = [r["error"] for r in results[2:]]
+    assert errors[0].startswith("JSONDecodeError")
+    assert errors[1] == "ValueError: job is not a JSON object"
+    assert errors[2] == "ValueError: Unknown generator 'NoSuchBox'"
+    assert "invalid float value: 'abc'" in errors[3]
+    assert errors[4] == "ValueError: no output given"
+    assert not (tmp_path / "x.svg").exists() and not (tmp_path / "bad.svg").exists()
+
+
+def test_batch_jobs(tmp_path: Path) -> None:
+    serial = tmp_path / "serial"
+    parallel = tmp_path / "parallel"
+    serial.mkdir()
+    parallel.mkdir()
+    _, expected = run(serial, 1)
+    failed, results = run(parallel, 2)
+    assert failed == 5
+    # same results in the same order - only the output directory differs
+    for result, exp in zip(results, expected, strict=True):
+        del result["seconds"], exp["seconds"]
+        assert json.dumps(result).replace("parallel", "serial") == json.dumps(exp)
+    for name in ("a.svg", "sub.name.dxf"):
+        assert (parallel / name).exists()
+
+
+def test_batch_cli(tmp_path: Path) -> None:
+    manifest = tmp_path / "manifest.jsonl"
+    result = subprocess.run(
+        [sys.executable, "-m", "boxes.scripts.boxes_main", "--batch", "-",
+         f"--manifest={manifest}", "--jobs", "2"],
+        input=jobs_file(tmp_path).getvalue(),
+        cwd=ROOT, capture_output=True, text=True, timeout=60)
+    # failed jobs are reported in the manifest and the exit code
+    assert result.returncode == 1
+    results = [json.loads(line) for line in manifest.read_text().splitlines()]
+    assert [r["status"] for r in results] == ["ok", "ok"] + ["error"] * 5
+    assert (tmp_path / "a.svg").exists()
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from boxes.scripts.boxes_bench import PHASES, bench, compare
+
+
+def test_bench() -> None:
+    result = bench("ABox", "svg", repeat=1)
+    assert set(PHASES) <= set(result)
+    assert result["total"] >= result["render"] > 0
+    assert result["segments"] >= result["paths"] >= result["parts"] > 0
+    assert result["size"] > 0
+    assert result["peak_memory"] > 0
+    assert "error" in bench("ABox", "nosuchformat", repeat=1)
+
+
+def test_compare() -> None:
+    baseline = {
+        "A/svg": {"total": 0.100, "peak_memory": 1000},
+        "B/svg": {"total": 0.100, "peak_memory": 1000},
+        "C/svg": {"total": 0.0001, "peak_memory": 1000},
+        "D/svg": {"error": "ValueError"},
+    }
+    results = {
+        "A/svg": {"total": 0.105, "peak_memory": 1000},
+        "B/svg": {"total": 0.150, "peak_memory": 2000},
+        "C/svg": {"total": 0.0005, "peak_memory": 1000},  # noise
+        "D/svg": {"total": 1.0, "peak_memory": 1000},
+        "E/svg": {"total": 1.0, "peak_memory": 1000},
+    }
+    assert compare(results, baseline, threshold=0.1) == [
+        ("B/svg", "total", 0.100, 0.150),
+        ("B/svg", "peak_memory", 1000, 2000),
+    ]
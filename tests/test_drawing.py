@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import pytest
+
+from boxes import drawing
+from boxes.drawing import Affine, Context, Surface
+
+
+def draw() -> Surface:
+    surface = Surface()
+    ctx = Context(surface)
+    for i in range(3):
+        ctx.move_to(10 * i, 0)
+        ctx.line_to(10 * i, 10)
+        ctx.curve_to(10 * i, 15, 10 * i + 5, 20, 10 * i + 10, 20)
+        ctx.stroke()
+    return surface
+
+
+@pytest.mark.parametrize("vectorized", [False, True])
+def test_transform(vectorized: bool, monkeypatch: pytest.MonkeyPatch) -> None:
+    if vectorized:
+        pytest.importorskip("numpy")
+        monkeypatch.setattr(drawing, "NUMPY_MIN_SEGMENTS", 0)
+    surface = draw()
+    extents = surface.extents()
+    assert (extents.xmin, extents.ymin, extents.xmax, extents.ymax) == (0, 0, 30, 20)
+    surface.transform(2.0, Affine.translation(5, 7))
+    extents = surface.extents()
+    assert (extents.xmin, extents.ymin, extents.xmax, extents.ymax) == (5, 7, 35, 27)
+    part = surface.parts[-1]
+    assert part.pathes[0].coords[:2].tolist() == [5, 7]
+    # the ends of the pathes are looked up at their new place
+    surface.move_to(35, 27)
+    surface.append("L", 40, 27)
+    surface.stroke(**part.pathes[-1].params)
+    assert len(part.pathes) == 3
+    assert part.pathes[-1].end_point() == (40, 27)
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import io
+import re
+import signal
+import subprocess
+import sys
+import zlib
+
+import pytest
+
+import boxes.generators
+from boxes.drawing import Context, GCodeSurface
+from boxes.formats import Formats
+
+
+def render(*args: str) -> bytes:
+    box = boxes.generators.getBoxGenerator("Gears")()
+    box.parseArgs(list(args))
+    box.metadata["reproducible"] = True
+    box.open()
+    box.render()
+    return box.close().getvalue()
+
+
+def dxf_pairs(data: bytes) -> list[tuple[int, str]]:
+    lines = data.decode("ascii").splitlines()
+    assert len(lines) % 2 == 0
+    return [(int(code), value) for code, value in zip(lines[::2], lines[1::2])]
+
+
+def test_dxf_structure() -> None:
+    pairs = dxf_pairs(render("--format=dxf"))
+    sections = [value for (code, value), prev in zip(pairs[1:], pairs)
+                if code == 2 and prev == (0, "SECTION")]
+    assert sections == ["HEADER", "TABLES", "ENTITIES"]
+    assert pairs[pairs.index((9, "$ACADVER")) + 1] == (1, "AC1009")
+    assert pairs[-1] == (0, "EOF")
+    # R12 has no handles
+    assert not any(code == 5 for code, _ in pairs)
+    entities = {value for code, value in pairs if code == 0}
+    assert {"LINE", "POLYLINE", "VERTEX", "SEQEND", "ARC", "TEXT"} <= entities
+    assert "SPLINE" not in entities and "LWPOLYLINE" not in entities
+    # all layers used are declared
+    layers = {value for (code, value), prev in zip(pairs[1:], pairs)
+              if code == 2 and prev == (0, "LAYER")}
+    assert {value for code, value in pairs if code == 8} <= layers
+
+
+def test_dxf_ezdxf() -> None:
+    ezdxf = pytest.importorskip("ezdxf")
+    from ezdxf import recover
+    doc, auditor = recover.read(io.BytesIO(render("--format=dxf")))
+    assert doc.dxfversion == "AC1009"
+    assert not auditor.has_errors
+    assert doc.units == ezdxf.units.MM
+    assert len(doc.modelspace().query("ARC")) > 0
+
+
+def test_pdf_structure() -> None:
+    data = render("--format=pdf")
+    assert data.startswith(b"%PDF-1.4\n")
+    assert data.endswith(b"%%EOF\n")
+    startxref = int(re.search(rb"startxref\n(\d+)\n%%EOF\n$", data).group(1))
+    assert data[startxref:].startswith(b"xref\n")
+    first, size = map(int, data[startxref:].split(b"\n")[1].split())
+    entries = data[startxref:].split(b"\n")[3:2 + size]
+    assert len(entries) == size - 1
+    objects = {}
+    for num, entry in enumerate(entries, 1):
+        offset = int(entry[:10])
+        assert data[offset:].startswith(b"%d 0 obj\n" % num)
+        objects[num] = data[offset:data.index(b"endobj", offset)]
+    # the content stream (4) holds the drawing, its length is in object 5
+    assert b"/Length 5 0 R /Filter /FlateDecode" in objects[4]
+    length = int(objects[5].split(b"\n")[1])
+    start = objects[4].index(b"stream\n") + len(b"stream\n")
+    assert objects[4][start + length:] == b"\nendstream\n"
+    content = zlib.decompress(objects[4][start:start + length])
+    assert b" l\n" in content and b" c\n" in content and b"Tj" in content
+
+
+def test_pdf_pypdf() -> None:
+    pypdf = pytest.importorskip("pypdf")
+    reader = pypdf.PdfReader(io.BytesIO(render("--format=pdf")), strict=True)
+    assert len(reader.pages) == 1
+    assert reader.metadata.title == "Boxes.py - Part - Gears"
+    assert "Pitch radius" in reader.pages[0].extract_text()
+
+
+def test_plotter_tolerance() -> None:
+    fine = render("--format=gcode")
+    coarse = render("--format=gcode", "--plotter_tolerance=0.5")
+    assert coarse.count(b"\n") < fine.count(b"\n")
+
+
+def test_gcode_settings() -> None:
+    default = render("--format=gcode")
+    assert b"F600" in default and b"S1000" in default
+    gcode = render("--format=gcode", "--gcode_cut=800:900.5")
+    assert b"F800" in gcode and b"S900.5" in gcode
+    assert b"F600" not in gcode
+
+
+def test_gcode_unknown_colors() -> None:
+    surface = GCodeSurface()
+    ctx = Context(surface)
+    surface.configure(cut=(700, 800))
+    for rgb in ((1.0, 0.0, 1.0), (0.2, 0.4, 0.6), (1.0, 0.0, 0.0)):
+        ctx.set_source_rgb(*rgb)
+        ctx.move_to(0, 0)
+        ctx.line_to(10, 0)
+        ctx.stroke()
+    gcode = b"".join(surface.stream()).decode()
+    # magenta and the custom colour are cut, annotations (red) are not
+    assert gcode.count("F700") == 2
+    assert "rgb(255,0,255)" in gcode and "rgb(51,102,153)" in gcode
+    assert "rgb(255,0,0)" not in gcode
+
+
+def test_plt_speed() -> None:
+    assert b"VS" not in render("--format=plt")
+    assert b"VS5.0;" in render("--format=plt", "--plt_speed=5")
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="uses /dev/stdin")
+def test_convert(monkeypatch: pytest.MonkeyPatch) -> None:
+    # formats not written natively are piped through an external command
+    monkeypatch.setitem(Formats.formats, "copy", "cp /dev/stdin {output}")
+    formats = Formats()
+    assert formats.needsConversion("copy")
+    data = formats.convert(iter([b"%!PS", b"\n"]), "copy")
+    assert data.getvalue() == b"%!PS\n"
+    data = formats.convert(io.BytesIO(b"%!PS\n"), "copy")
+    assert data.getvalue() == b"%!PS\n"
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="uses tail -f")
+def test_convert_input_error(monkeypatch: pytest.MonkeyPatch) -> None:
+    # a converter that never ends on its own
+    monkeypatch.setitem(Formats.formats, "follow", "tail -f {output}")
+    procs = []
+    popen = subprocess.Popen
+
+    def Popen(*args, **kw):
+        procs.append(popen(*args, **kw))
+        return procs[-1]
+
+    monkeypatch.setattr(subprocess, "Popen", Popen)
+
+    def chunks():
+        yield b"%!PS\n"
+        raise RuntimeError("broken part")
+
+    with pytest.raises(RuntimeError, match="broken part"):
+        Formats().convert(chunks(), "follow")
+    assert procs[0].returncode == -signal.SIGKILL
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Modules that are expensive to import and only needed by few generators.
+# They must be imported where they are used - not by "import boxes".
+DEFERRED = ("shapely", "qrcode", "numpy", "xml.sax.saxutils",
+            "boxes.gears", "boxes.parts", "boxes.pulley")
+
+
+def run(code: str) -> str:
+    return subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True,
+                          capture_output=True, text=True).stdout
+
+
+@pytest.mark.parametrize("module", ["boxes", "boxes.generators"])
+def test_deferred_imports(module: str) -> None:
+    loaded = run(f"import sys, {module}; print(' '.join(sys.modules))").split()
+    assert [m for m in DEFERRED if m in loaded] == []
+
+
+def test_import_time() -> None:
+    """Loose upper bound to catch new heavy imports. It takes ~0.1s."""
+    t = float(run("import time; t = time.perf_counter(); import boxes; "
+                  "print(time.perf_counter() - t)"))
+    assert t < 1.0
+
+
+@pytest.mark.parametrize("name", ["gears", "parts", "pulley", "qrcode", "Polygon", "split"])
+def test_lazy_attributes(name: str) -> None:
+    """The deferred modules are still available as attributes of boxes"""
+    assert run(f"import boxes; print(boxes.{name} is not None)").strip() == "True"
+
+
+def test_lazy_attribute_values() -> None:
+    import boxes
+    import boxes.gears
+    import qrcode
+    assert boxes.gears is sys.modules["boxes.gears"]
+    assert boxes.qrcode is qrcode
+    assert hasattr(boxes.gears, "Gears")
+    with pytest.raises(AttributeError):
+        boxes.no_such_name
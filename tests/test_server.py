@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import gzip
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+from wsgiref.util import FileWrapper, setup_testing_defaults
+
+import pytest
+
+from boxes.drawing import SVGSurface
+from boxes.generators.abox import ABox
+from boxes.scripts.boxesserver import BServer, PreviewRegistry, accepts_encoding, wsgi_server
+
+
+@pytest.fixture
+def server() -> BServer:
+    return BServer()
+
+
+def request(server: BServer, path: str, query: str, **environ):
+    env: dict = {}
+    setup_testing_defaults(env)
+    env.update({"wsgi.file_wrapper": FileWrapper, "PATH_INFO": path,
+                "QUERY_STRING": query}, **environ)
+    response = {}
+
+    def start_response(status, headers):
+        response["status"] = status
+        response["headers"] = dict(headers)
+
+    body = b"".join(server.serve(env, start_response))
+    return response["status"], response["headers"], body
+
+
+def test_render_cache_key(server: BServer) -> None:
+    _, _, first = request(server, "/ABox", "x=120&y=80&render=1")
+    _, _, second = request(server, "/ABox", "render=1&y=80&h=100.0&x=120")
+    assert len(server.renderCache) == 1
+    assert first == second
+    # the URL is kept - normalised
+    assert b"http://127.0.0.1/ABox?x=120&amp;y=80&amp;render=1" in first
+    # the output contains the host name
+    request(server, "/ABox", "x=120&y=80&render=1", HTTP_HOST="boxes.example.org")
+    assert len(server.renderCache) == 2
+
+
+def test_qr_code_url(server: BServer) -> None:
+    _, _, data = request(server, "/ABox", "qr_code=1&x=120&render=1")
+    assert b"http://127.0.0.1/ABox?x=120" in data
+
+
+def test_etag(server: BServer) -> None:
+    _, headers, _ = request(server, "/ABox", "x=120&y=80&render=1")
+    etag = headers["ETag"]
+    status, headers, body = request(server, "/ABox", "render=1&y=80&x=120",
+                                    HTTP_IF_NONE_MATCH=etag)
+    assert status.startswith("304")
+    assert headers["ETag"] == etag
+    assert body == b""
+
+
+def test_wsgi_render_timeout() -> None:
+    assert wsgi_server({}).render_timeout == 30
+    assert wsgi_server({"RENDER_TIMEOUT": "5"}).render_timeout == 5
+    assert wsgi_server({"RENDER_TIMEOUT": "0"}).render_timeout is None
+
+
+@pytest.mark.parametrize("isolate", [False, True])
+def test_render_timeout(isolate: bool) -> None:
+    server = BServer(render_timeout=30, isolate_renders=isolate)
+    box = server.boxes["ABox"]()
+    box.parseArgs([])
+    chunks = list(server.renderBox(box))
+    # only isolated renders are sent in one piece through a pipe
+    assert (len(chunks) == 1) == isolate
+    assert b"".join(chunks).endswith(b"</svg>")
+
+
+def test_render_error_in_output(server: BServer, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Errors while writing the output end in an error page - not in a
+    truncated file"""
+    stream = SVGSurface.stream
+
+    def failing_stream(self, inner_corners="loop"):
+        chunks = stream(self, inner_corners)
+        yield next(chunks)
+        raise RuntimeError("broken part")
+
+    monkeypatch.setattr(SVGSurface, "stream", failing_stream)
+    status, headers, body = request(server, "/ABox", "render=1")
+    assert status.startswith("500")
+    assert b"broken part" in body
+    assert len(server.renderCache) == 0
+
+
+def test_preview_registry() -> None:
+    previews = PreviewRegistry()
+    previews.register("tab", 2)
+    assert not previews.superseded("tab", 2)
+    assert previews.superseded("tab", 1)
+    assert not previews.superseded("other", 1)
+    # requests may arrive out of order
+    previews.register("tab", 1)
+    assert previews.superseded("tab", 1)
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_preview_registry_workers() -> None:
+    # forked workers share the registry
+    previews = PreviewRegistry()
+    previews.register("tab", 1)
+    worker = multiprocessing.get_context("fork").Process(
+        target=previews.register, args=("tab", 2))
+    worker.start()
+    worker.join(30)
+    assert previews.superseded("tab", 1)
+
+
+def test_preview_cancelled(server: BServer, monkeypatch: pytest.MonkeyPatch) -> None:
+    render = ABox.render
+
+    def superseded_render(self):
+        # a newer preview of the tab comes in while rendering
+        server.previews.register("tab", 2)
+        render(self)
+
+    monkeypatch.setattr(ABox, "render", superseded_render)
+    status, _, body = request(server, "/ABox", "render=4",
+                              HTTP_X_PREVIEW_TAB="tab", HTTP_X_PREVIEW_SEQ="1")
+    assert status.startswith("204")
+    assert body == b""
+    assert len(server.renderCache) == 0
+    # outdated requests are not rendered at all
+    monkeypatch.setattr(ABox, "render", render)
+    status, _, _ = request(server, "/ABox", "render=4",
+                           HTTP_X_PREVIEW_TAB="tab", HTTP_X_PREVIEW_SEQ="1")
+    assert status.startswith("204")
+    status, _, body = request(server, "/ABox", "render=4",
+                              HTTP_X_PREVIEW_TAB="tab", HTTP_X_PREVIEW_SEQ="3")
+    assert status.startswith("200")
+    assert body.rstrip().endswith(b"</svg>")
+
+
+@pytest.mark.parametrize("header, accepted", [
+    ("", False),
+    ("gzip", True),
+    ("deflate, gzip;q=0.5", True),
+    ("gzip;q=0", False),
+    ("GZIP ; q=1.0", True),
+    ("*", True),
+    ("br, identity", False),
+])
+def test_accepts_encoding(header: str, accepted: bool) -> None:
+    assert accepts_encoding({"HTTP_ACCEPT_ENCODING": header}, "gzip") == accepted
+
+
+def test_static(server: BServer) -> None:
+    status, headers, plain = request(server, "/static/self.css", "")
+    assert status.startswith("200")
+    assert headers["Content-type"] == "text/css; charset=utf-8"
+    assert headers["Vary"] == "Accept-Encoding"
+    assert "Content-Encoding" not in headers
+    assert headers["Cache-Control"] == "public, max-age=3600"
+    assert int(headers["Content-Length"]) == len(plain)
+
+    status, gz_headers, compressed = request(server, "/static/self.css", "",
+                                             HTTP_ACCEPT_ENCODING="gzip, deflate")
+    assert gz_headers["Content-Encoding"] == "gzip"
+    assert gz_headers["ETag"] == headers["ETag"]
+    assert len(compressed) < len(plain)
+    assert gzip.decompress(compressed) == plain
+
+    # versioned URLs as used in the pages never change
+    url = server.staticURL("self.css")
+    path, query = url.split("?")
+    _, headers, _ = request(server, "/" + path, query)
+    assert headers["Cache-Control"] == "public, max-age=31536000, immutable"
+
+    status, headers, body = request(server, "/static/self.css", "",
+                                    HTTP_IF_NONE_MATCH=headers["ETag"])
+    assert status.startswith("304")
+    assert body == b""
+    assert headers["Vary"] == "Accept-Encoding"
+
+
+def test_static_binary_and_missing(server: BServer) -> None:
+    # compressed already - no gzip variant
+    status, headers, data = request(server, "/static/nothing.png", "",
+                                    HTTP_ACCEPT_ENCODING="gzip")
+    assert headers["Content-type"] == "image/png"
+    assert "Content-Encoding" not in headers and "Vary" not in headers
+    assert data.startswith(b"\x89PNG")
+    # missing thumbnails are replaced
+    status, _, thumb = request(server, "/static/samples/NoSuchBox-thumb.jpg", "")
+    assert status.startswith("200") and thumb == data
+    status, _, _ = request(server, "/static/no-such-file.css", "")
+    assert status.startswith("404")
+
+
+def test_render_gzip(server: BServer) -> None:
+    _, headers, plain = request(server, "/ABox", "render=1")
+    assert "Content-Encoding" not in headers
+    assert headers["Vary"] == "Accept-Language, Accept-Encoding"
+    _, gz_headers, compressed = request(server, "/ABox", "render=1",
+                                        HTTP_ACCEPT_ENCODING="gzip")
+    assert gz_headers["Content-Encoding"] == "gzip"
+    assert gz_headers["Vary"] == "Accept-Language, Accept-Encoding"
+    # different representations need different ETags
+    assert gz_headers["ETag"] != headers["ETag"]
+    assert gzip.decompress(compressed) == plain
+    assert len(compressed) * 3 < len(plain)
+    status, headers, body = request(server, "/ABox", "render=1",
+                                    HTTP_ACCEPT_ENCODING="gzip",
+                                    HTTP_IF_NONE_MATCH=gz_headers["ETag"])
+    assert status.startswith("304") and body == b""
+    assert headers["Vary"] == "Accept-Language, Accept-Encoding"
+    # formats that are compressed already
+    _, headers, data = request(server, "/ABox", "render=1&format=svgz",
+                               HTTP_ACCEPT_ENCODING="gzip")
+    assert "Content-Encoding" not in headers
+    assert gzip.decompress(data).startswith(b"<?xml")
+
+
+def get(url: str, timeout: float = 30) -> bytes:
+    """GET url - waiting for the server to come up"""
+    end = time.monotonic() + timeout
+    while True:
+        try:
+            with urllib.request.urlopen(url, timeout=timeout) as response:
+                return response.read()
+        except OSError:
+            if time.monotonic() > end:
+                raise
+            time.sleep(0.1)
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_prefork_server() -> None:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "boxes.scripts.boxesserver", "--host=127.0.0.1",
+         f"--port={port}", "--workers=2"],
+        cwd=Path(__file__).resolve().parent.parent,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        start_new_session=True)
+    try:
+        url = f"http://127.0.0.1:{port}"
+        assert get(url + "/ABox?render=1").rstrip().endswith(b"</svg>")
+        # reloading keeps the socket - no request is refused
+        proc.send_signal(signal.SIGHUP)
+        for _ in range(10):
+            assert get(url + "/static/self.css", timeout=5)
+        # stops the reload - or the new server if it is starting already
+        proc.send_signal(signal.SIGTERM)
+        assert proc.wait(30) in (0, -signal.SIGTERM)
+    finally:
+        if proc.poll() is None:
+            # including the workers
+            os.killpg(proc.pid, signal.SIGKILL)
+            proc.wait()
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import os
 import sys
 from pathlib import Path
 
@@ -13,6 +14,22 @@ except ImportError:
     import boxes
 
 import boxes.generators
+from boxes.drawing import RenderBudgetExceeded
+from boxes.scripts.boxes_main import EXAMPLE_SKIP, render_examples
+
+
+@pytest.fixture(scope="session")
+def examples(request) -> dict:
+    """Render all selected generators up front - in parallel
+
+    Uses BOXES_TEST_JOBS processes, default: one per CPU.
+    """
+    names = [item.callspec.params["generator"].__name__
+             for item in request.session.items
+             if getattr(item, "originalname", None) == "test_generator"]
+    names = [name for name in names if name not in TestSVG.avoidGenerator]
+    jobs = int(os.environ.get("BOXES_TEST_JOBS", 0))
+    return {result.name: result for result in render_examples(names, jobs)}
 
 
 class TestSVG:
@@ -23,13 +40,30 @@ class TestSVG:
     all_generators = boxes.generators.getAllBoxGenerators().values()
 
     # Ignore multistep generators and generators which require input.
-    notTestGenerators = ('GridfinityTrayLayout', 'TrayLayout', 'TrayLayoutFile', 'TypeTray', 'Edges',)
+    notTestGenerators = EXAMPLE_SKIP
     brokenGenerators = ()
     avoidGenerator = notTestGenerators + brokenGenerators
 
     def test_generators_available(self) -> None:
         assert len(self.all_generators) != 0
 
+    def test_generator_index(self) -> None:
+        """boxes/generators/_index.py needs to be regenerated with
+        boxes.generators.writeGeneratorIndex() if this fails."""
+        from boxes.generators._index import GENERATORS
+        scanned = boxes.generators.generatorIndexEntries(boxes.generators.scanBoxGenerators())
+        assert GENERATORS == scanned
+
+    @pytest.mark.parametrize("budget", [{"max_segments": 1000}, {"max_render_time": 0.0}])
+    def test_render_budget(self, budget: dict) -> None:
+        box = boxes.generators.getBoxGenerator("TypeTray")()
+        box.parseArgs(["--sx=20*10", "--sy=20*10"])
+        for attr, value in budget.items():
+            setattr(box, attr, value)
+        box.open()
+        with pytest.raises(RenderBudgetExceeded):
+            box.render()
+
     # svgcheck currently do not allow inkscape custom tags.
     # @staticmethod
     # def is_valid_svg(file_path: str) -> bool:
@@ -53,31 +87,27 @@ class TestSVG:
         all_generators,
         ids=idfunc.__func__,
     )
-    def test_generator(self, generator: type[boxes.Boxes], capsys) -> None:
+    def test_generator(self, generator: type[boxes.Boxes], examples) -> None:
         boxName = generator.__name__
         if boxName in self.avoidGenerator:
             pytest.skip("Skipped generator")
-        box = generator()
-        box.parseArgs("")
-        box.metadata["reproducible"] = True
-        box.open()
-        box.render()
-        boxData = box.close()
+        result = examples[boxName]
 
-        out, err = capsys.readouterr()
+        assert result.error is None, result.error
+        boxData = result.data
 
-        assert 100 < boxData.__sizeof__(), "No data generated."
-        assert 0 == len(out), "Console output generated."
-        assert 0 == len(err), "Console error generated."
+        assert 100 < len(boxData), "No data generated."
+        assert 0 == len(result.out), "Console output generated."
+        assert 0 == len(result.err), "Console error generated."
 
         # Use external library lxml as cross-check.
-        assert self.is_valid_xml_by_lxml(boxData.getvalue()) is True, "Invalid XML according to library lxml."
+        assert self.is_valid_xml_by_lxml(boxData) is True, "Invalid XML according to library lxml."
 
         file = Path(__file__).resolve().parent / 'data' / (boxName + '.svg')
-        file.write_bytes(boxData.getvalue())
+        file.write_bytes(boxData)
 
         # Use example data from repository as reference data.
         referenceData = Path(__file__).resolve().parent.parent / 'examples' / (boxName + '.svg')
         assert referenceData.exists() is True, "Reference file for comparison does not exist."
         assert referenceData.is_file() is True, "Reference file for comparison does not exist."
-        assert referenceData.read_bytes() == boxData.getvalue(), "SVG files are not equal. If change is intended, please update example files."
+        assert referenceData.read_bytes() == boxData, "SVG files are not equal. If change is intended, please update example files."
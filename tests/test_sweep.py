@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+from pathlib import Path
+
+from boxes.scripts.boxes_main import render_parts
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_render_parts_error() -> None:
+    parts, count, error = render_parts(("BurnTest", ["--burn=abc"]))
+    assert parts is None
+    assert "invalid float value" in error
+
+
+def test_sweep_sheet_bad_value(tmp_path: Path) -> None:
+    output = tmp_path / "sweep.svg"
+    result = subprocess.run(
+        [sys.executable, "-m", "boxes.scripts.boxes_main", "BurnTest",
+         "--sweep", "burn=0.1,abc", "--sweep_sheet", "--jobs", "2",
+         f"--output={output}"],
+        cwd=ROOT, capture_output=True, text=True, timeout=60)
+    assert result.returncode != 0
+    assert "FAILED: burn=abc" in result.stdout
+    assert not output.exists()